@@ -1,70 +1,325 @@
-from flask import Flask, request, jsonify
-from sqlmodel import Session, select, create_engine
-from university_db import University, Department, Student
+import threading
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import false
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, insert, update, delete, func, tuple_
+from database import RoutingSession, get_read_engine
+from university_db import University, Department, Student, engine, init_db
+import lookup_cache
+import metrics
+import response_cache
+import student_directory
+from dedupe import name_columns, normalize_name
+from lookup_cache import get_university_id, get_department_id
+from pagination import paginate, stream
+from response_cache import ResponseCache
+from serialization import (
+    MSGPACK_MIMETYPES, STUDENT_FIELDS, FastJSONProvider, encode_msgpack, parse_fields, preferred_mimetype, project, student_columns, student_select,
+)
+from search import SEARCH_MODES, iter_search_results, name_matches, search_students
+from upserts import university_upsert, department_upsert, student_insert_if_new
+from write_batcher import WriteBatcher, WriteRejected
 
 app = Flask(__name__)
-DATABASE_URL = "sqlite:///university.db"
-engine = create_engine(DATABASE_URL, echo=True)
+app.json = FastJSONProvider(app)
+metrics.install(app, engine, get_read_engine())
 
 # DB SESSION
+# Reads use the read-only pool; a session moves to the writer once it writes
 def get_session():
-    return Session(engine)
+    return RoutingSession(engine)
+
+# Single-student writes are group-committed by one writer thread
+write_batcher = WriteBatcher(engine)
+
+# Update/delete find and change a student in one Core statement, without
+# loading it into the ORM
+students = Student.__table__
+
+class DuplicateStudentError(ValueError):
+    pass
+
+class StudentNotFoundError(LookupError):
+    pass
+
+def write_rejected(e: WriteRejected):
+    """503 with Retry-After for a write refused by admission control"""
+    print(f"⏳ Write rejected ({e.reason}): {e}")
+    response = jsonify({"status": "failed", "message": str(e)})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+# STARTUP
+# Schema setup and cache warm-up run once per process, before its first
+# request, so importing this module (e.g. in a pre-fork master) does no I/O.
+startup_done = False
+startup_lock = threading.Lock()
+
+@app.before_request
+def startup():
+    global startup_done
+    if startup_done:
+        return
+    with startup_lock:
+        if not startup_done:
+            # Charged to route="background", not to the first request
+            with metrics.background():
+                init_db(engine)
+                with get_session() as warm_session:
+                    lookup_cache.warm(warm_session)
+            startup_done = True
 
 # HELPER FUNCTIONS
 @app.route("/")
 def home():
     return "University Student Management API is running."
 
-def get_university_by_name(name: str):
-    with get_session() as session:
-        return session.exec(
-            select(University).where(University.university_name == name)
-        ).first()
-
-def add_university_entry(name: str, location: str):
-    with get_session() as session:
-        uni = University(university_name=name, location=location)
-        session.add(uni)
-        session.commit()
-        session.refresh(uni)
-        return uni
-
-def get_department_by_name(dept_name: str, uni_id: int):
-    with get_session() as session:
-        return session.exec(
-            select(Department)
-            .where(Department.department_name == dept_name)
-            .where(Department.university_id == uni_id)
-        ).first()
-
-def add_department_entry(dept_name: str, uni_id: int):
-    with get_session() as session:
-        dept = Department(department_name=dept_name, university_id=uni_id)
-        session.add(dept)
-        session.commit()
-        session.refresh(dept)
-        return dept
-
-def get_student_by_details(name: str, year: int, dept_id: int):
-    with get_session() as session:
-        return session.exec(
-            select(Student)
-            .where(Student.student_name == name)
-            .where(Student.enrollment_year == year)
-            .where(Student.department_id == dept_id)
-        ).first()
-
-def add_student_entry_to_db(name: str, year: int, dept_id: int):
-    with get_session() as session:
-        student = Student(
-            student_name=name,
-            enrollment_year=year,
-            department_id=dept_id
-        )
-        session.add(student)
-        session.commit()
-        session.refresh(student)
-        return student
+def upsert_university(session: Session, name: str, location: str):
+    """Insert the university unless it exists and return its id in a single statement"""
+    return session.exec(university_upsert(name, location)).scalar_one()
+
+def upsert_department(session: Session, dept_name: str, uni_id: int):
+    """Insert the department unless it exists and return its id in a single statement"""
+    return session.exec(department_upsert(dept_name, uni_id)).scalar_one()
+
+def insert_student_if_new(session: Session, name: str, year: int, dept_id: int):
+    """Insert the student and return its id, or None when it already exists"""
+    return session.exec(student_insert_if_new(name, year, dept_id)).scalar_one_or_none()
+
+# BULK HELPERS
+BULK_CHUNK_SIZE = 500
+
+def chunked(items, size: int = BULK_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def parse_bulk_payload():
+    """Return the rows of a JSON array or NDJSON body; unparseable NDJSON lines come back as None"""
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+
+    rows = []
+    for line in request.get_data(as_text=True).splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(app.json.loads(line))
+        except ValueError:
+            rows.append(None)
+    return rows
+
+def validate_bulk_row(row):
+    """Return (clean_row, error_message) for one bulk ingest row"""
+    if not isinstance(row, dict):
+        return None, "Row is not a JSON object"
+
+    student_name = row.get("name")
+    year = row.get("year")
+    department_name = row.get("department")
+    university_name = row.get("university")
+    location = row.get("location", "Tirupati")  # Default location
+    if not all([student_name, year, department_name, university_name]):
+        return None, "All fields are required"
+    for field, value in (("name", student_name), ("department", department_name), ("university", university_name), ("location", location)):
+        if not isinstance(value, str):
+            return None, f"'{field}' must be a string"
+
+    # An int, or a string of one; bools and floats are not years
+    if isinstance(year, bool) or not isinstance(year, (int, str)):
+        return None, f"Invalid year '{year}'"
+    try:
+        year = int(year)
+    except ValueError:
+        return None, f"Invalid year '{year}'"
+
+    return {
+        "name": student_name,
+        "year": year,
+        "department": department_name,
+        "university": university_name,
+        "location": location,
+    }, None
+
+def resolve_university_ids(session: Session, locations_by_name: dict):
+    """Map every university name to an id, inserting the missing ones in multi-row chunks"""
+    university_ids = {}
+    for names in chunked(locations_by_name):
+        rows = session.exec(
+            select(University.university_id, University.university_name)
+            .where(University.university_name.in_(names))
+            .order_by(University.university_id)
+        ).all()
+        for university_id, university_name in rows:
+            university_ids.setdefault(university_name, university_id)
+
+    missing = [name for name in locations_by_name if name not in university_ids]
+    for names in chunked(missing):
+        session.exec(sqlite_insert(University).values([
+            {"university_name": name, "location": locations_by_name[name]} for name in names
+        ]).on_conflict_do_nothing())
+        rows = session.exec(
+            select(University.university_id, University.university_name)
+            .where(University.university_name.in_(names))
+            .order_by(University.university_id)
+        ).all()
+        for university_id, university_name in rows:
+            university_ids.setdefault(university_name, university_id)
+    return university_ids
+
+def resolve_department_ids(session: Session, keys: set):
+    """Map every (department name, university id) pair to an id, inserting the missing ones"""
+    department_ids = {}
+    for chunk in chunked(keys):
+        rows = session.exec(
+            select(Department.department_id, Department.department_name, Department.university_id)
+            .where(tuple_(Department.department_name, Department.university_id).in_(chunk))
+            .order_by(Department.department_id)
+        ).all()
+        for department_id, department_name, university_id in rows:
+            department_ids.setdefault((department_name, university_id), department_id)
+
+    missing = [key for key in keys if key not in department_ids]
+    for chunk in chunked(missing):
+        session.exec(sqlite_insert(Department).values([
+            {"department_name": name, "university_id": uni_id} for name, uni_id in chunk
+        ]).on_conflict_do_nothing())
+        rows = session.exec(
+            select(Department.department_id, Department.department_name, Department.university_id)
+            .where(tuple_(Department.department_name, Department.university_id).in_(chunk))
+            .order_by(Department.department_id)
+        ).all()
+        for department_id, department_name, university_id in rows:
+            department_ids.setdefault((department_name, university_id), department_id)
+    return department_ids
+
+def find_existing_students(session: Session, keys: set):
+    """Return the subset of (name key, year, department id) keys that already exist"""
+    existing = set()
+    for chunk in chunked(keys):
+        rows = session.exec(
+            select(Student.name_key, Student.enrollment_year, Student.department_id)
+            .where(tuple_(Student.name_key, Student.enrollment_year, Student.department_id).in_(chunk))
+        ).all()
+        existing.update(tuple(row) for row in rows)
+    return existing
+
+# BATCH HELPERS
+BATCH_MAX_IDS = 10_000  # stays well under SQLite's bound-parameter limit
+
+def batch_criteria(session: Session, data: dict):
+    """Return (where clauses, error) for a batch payload of student_ids or name/year/department/university filters
+
+    A department or university that does not exist yields a clause that
+    matches nothing, never a broader filter. Names match exactly: these
+    filters pick rows to change or delete, so "Ali" must not reach "Alice".
+    """
+    student_ids = data.get("student_ids")
+    name = data.get("name")
+    year = data.get("year")
+    department_name = data.get("department")
+    university_name = data.get("university")
+
+    criteria = []
+    if student_ids is not None:
+        if not isinstance(student_ids, list) or not student_ids:
+            return None, "student_ids must be a non-empty list"
+        if len(student_ids) > BATCH_MAX_IDS:
+            return None, f"At most {BATCH_MAX_IDS} student_ids per batch"
+        try:
+            criteria.append(Student.student_id.in_([int(student_id) for student_id in student_ids]))
+        except (TypeError, ValueError):
+            return None, "student_ids must be integers"
+    if name:
+        criteria.append(Student.student_name == name)
+    if year:
+        criteria.append(Student.enrollment_year == year)
+    if department_name and not university_name:
+        return None, "department requires university"
+    if university_name:
+        uni_id = get_university_id(session, university_name)
+        if department_name:
+            dept_id = get_department_id(session, department_name, uni_id) if uni_id else None
+            criteria.append(Student.department_id == dept_id if dept_id else false())
+        elif uni_id:
+            criteria.append(Student.department_id.in_(
+                select(Department.department_id).where(Department.university_id == uni_id)
+            ))
+        else:
+            criteria.append(false())
+
+    if not criteria:
+        return None, "Provide student_ids or at least one filter (name, year, department, university)"
+    return criteria, None
+
+def student_condition(session: Session, student_id=None, name=None, year=None, department_name=None, university_name=None):
+    """Core condition matching the one student an update/delete body refers to, preferring student_id"""
+    if student_id:
+        return students.c.student_id == int(student_id)
+    query = select(students.c.student_id)
+    if name:
+        query = query.where(students.c.student_id.in_(name_matches(name)))
+    if year:
+        query = query.where(students.c.enrollment_year == year)
+    if department_name and university_name:
+        uni_id = get_university_id(session, university_name)
+        if uni_id:
+            dept_id = get_department_id(session, department_name, uni_id)
+            if dept_id:
+                query = query.where(students.c.department_id == dept_id)
+    return students.c.student_id == query.limit(1).scalar_subquery()
+
+def count_matching(session: Session, criteria):
+    return session.exec(select(func.count()).select_from(Student).where(*criteria)).one()
+
+# RESPONSE CACHE HELPERS
+SEARCH_TABLES = ("student", "student_name_fts")
+search_cache = ResponseCache()
+
+def cached_response(cache: ResponseCache, entry):
+    """Answer from a cached entry: 304 when the client's validators still match, else the stored body"""
+    if_modified_since = request.if_modified_since
+    if cache.is_not_modified(
+        entry, request.headers.get("If-None-Match"), if_modified_since.timestamp() if if_modified_since else None
+    ):
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype=entry.mimetype)
+    response.headers["ETag"] = entry.etag
+    response.headers["Last-Modified"] = entry.last_modified_header
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Accept"
+    return response
+
+# SERIALIZATION HELPERS
+def respond(payload: dict, status: int = 200):
+    """Encode a success payload as JSON, or as MessagePack when the client's Accept prefers it"""
+    mimetype = preferred_mimetype(request.accept_mimetypes)
+    if mimetype in MSGPACK_MIMETYPES:
+        return Response(encode_msgpack(payload), mimetype=mimetype), status
+    return jsonify(payload), status
+
+# STREAMING HELPERS
+def wants_ndjson():
+    return request.args.get("format") == "ndjson" or request.accept_mimetypes.best == "application/x-ndjson"
+
+def ndjson_response(iter_students, fields=STUDENT_FIELDS):
+    """Stream one JSON object per line; the session stays open only while the client reads"""
+    def generate():
+        rows = 0
+        try:
+            with get_session() as session:
+                for student in iter_students(session):
+                    rows += 1
+                    yield app.json.dumps(project(student, fields)) + "\n"
+        finally:
+            metrics.record_rows(rows)
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 # ROUTES
 
@@ -85,28 +340,28 @@ def add_student_entry():
         if not all([student_name, year, department_name, university_name]):
             return jsonify({"status": "failed", "message": "All fields are required"}), 400
 
-        university_obj = get_university_by_name(university_name)
-        if university_obj:
-            university_id = university_obj.university_id
-        else:
-            university_obj = add_university_entry(university_name, location)
-            university_id = university_obj.university_id
-
-        department_obj = get_department_by_name(department_name, university_id)
-        if department_obj:
-            department_id = department_obj.department_id
-        else:
-            department_obj = add_department_entry(department_name, university_id)
-            department_id = department_obj.department_id
-
-        existing_student = get_student_by_details(student_name, year, department_id)
-        if existing_student:
-            return jsonify({
-                "status": "failed",
-                "message": f"Student '{student_name}' already exists in this department and year."
-            }), 409
-
-        add_student_entry_to_db(student_name, year, department_id)
+        # One job: each upsert resolves its id in a single statement, and the
+        # unique indexes keep concurrent workers from duplicating rows. Cached
+        # ids skip their upserts; new ids are cached only after commit.
+        def add_job(session: Session):
+            university_id = lookup_cache.university_ids.get(university_name)
+            if university_id is None:
+                university_id = upsert_university(session, university_name, location)
+            department_id = lookup_cache.department_ids.get((department_name, university_id))
+            if department_id is None:
+                department_id = upsert_department(session, department_name, university_id)
+            if insert_student_if_new(session, student_name, year, department_id) is None:
+                raise DuplicateStudentError(f"Student '{student_name}' already exists in this department and year.")
+            return university_id, department_id
+
+        try:
+            university_id, department_id = write_batcher.run(add_job)
+        except DuplicateStudentError as e:
+            return jsonify({"status": "failed", "message": str(e)}), 409
+        except WriteRejected as e:
+            return write_rejected(e)
+        lookup_cache.university_ids.put(university_name, university_id)
+        lookup_cache.department_ids.put((department_name, university_id), department_id)
         print("✅ Student added successfully")
 
         return jsonify({"status": "success", "message": "Student added successfully"}), 200
@@ -115,6 +370,69 @@ def add_student_entry():
         print(f"❌ Error occurred: {e}")
         return jsonify({"status": "failed", "message": str(e)}), 500
 
+# BULK ADD STUDENTS
+@app.route("/students/bulk_add", methods=["POST"])
+def bulk_add_students():
+    try:
+        rows = parse_bulk_payload()
+        print(f"Received {len(rows)} rows for bulk add")
+
+        if not rows:
+            return jsonify({"status": "failed", "message": "Provide a JSON array or NDJSON body"}), 400
+
+        report = [None] * len(rows)
+        valid = []
+        for index, row in enumerate(rows):
+            clean, error = validate_bulk_row(row)
+            if error:
+                report[index] = {"row": index, "status": "invalid", "message": error}
+            else:
+                valid.append((index, clean))
+
+        with get_session() as session:
+            locations = {}
+            for _, clean in valid:
+                locations.setdefault(clean["university"], clean["location"])
+            university_ids = resolve_university_ids(session, locations)
+
+            department_keys = {(clean["department"], university_ids[clean["university"]]) for _, clean in valid}
+            department_ids = resolve_department_ids(session, department_keys)
+
+            # Duplicates are matched on the normalized name key, within the
+            # payload as well as against the table
+            names, student_keys = {}, {}
+            for index, clean in valid:
+                department_id = department_ids[(clean["department"], university_ids[clean["university"]])]
+                names[index] = clean["name"]
+                student_keys[index] = (normalize_name(clean["name"]), clean["year"], department_id)
+            existing = find_existing_students(session, set(student_keys.values()))
+
+            new_students = []
+            for index, key in student_keys.items():
+                name = names[index]
+                if key in existing:
+                    report[index] = {
+                        "row": index,
+                        "status": "duplicate",
+                        "message": f"Student '{name}' already exists in this department and year."
+                    }
+                    continue
+                existing.add(key)
+                new_students.append(dict(name_columns(name), student_name=name, enrollment_year=key[1], department_id=key[2]))
+                report[index] = {"row": index, "status": "created"}
+
+            for chunk in chunked(new_students):
+                session.exec(insert(Student).values(chunk))
+            session.commit()
+
+        summary = {status: sum(1 for r in report if r["status"] == status) for status in ("created", "duplicate", "invalid")}
+        print(f"✅ Bulk add finished: {summary}")
+        return jsonify({"status": "success", "summary": summary, "results": report}), 200
+
+    except Exception as e:
+        print(f"❌ Error in bulk add: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
 # FLEXIBLE UPDATE STUDENT
 @app.route("/students/update", methods=["PUT"])
 def flexible_update_student():
@@ -131,47 +449,47 @@ def flexible_update_student():
         if not any([student_id, name, department_name, university_name, year]):
             return jsonify({"status": "failed", "message": "Provide at least one identifying field"}), 400
 
-        with get_session() as session:
-            student = None
-
-            # 🎯 Prefer ID if given
-            if student_id:
-                student = session.get(Student, int(student_id))
-            else:
-                query = select(Student)
-                if name:
-                    query = query.where(Student.student_name.ilike(f"%{name}%"))
-                if year:
-                    query = query.where(Student.enrollment_year == year)
-                if department_name and university_name:
-                    uni = get_university_by_name(university_name)
-                    if uni:
-                        dept = get_department_by_name(department_name, uni.university_id)
-                        if dept:
-                            query = query.where(Student.department_id == dept.department_id)
-                student = session.exec(query).first()
-
-            if not student:
-                return jsonify({"status": "failed", "message": "Student not found"}), 404
-
+        def update_job(session: Session):
             # 🧩 Update fields
+            values = {}
             if "new_name" in data:
-                student.student_name = data["new_name"]
+                values["student_name"] = data["new_name"]
+                values.update(name_columns(data["new_name"]))
             if "new_year" in data:
-                student.enrollment_year = data["new_year"]
+                values["enrollment_year"] = data["new_year"]
             if "new_department" in data and "new_university" in data:
-                uni = get_university_by_name(data["new_university"])
-                if uni:
-                    dept = get_department_by_name(data["new_department"], uni.university_id)
-                    if dept:
-                        student.department_id = dept.department_id
-
-            session.add(student)
-            session.commit()
-            session.refresh(student)
+                uni_id = get_university_id(session, data["new_university"])
+                if uni_id:
+                    dept_id = get_department_id(session, data["new_department"], uni_id)
+                    if dept_id:
+                        values["department_id"] = dept_id
+
+            # 🎯 Prefer ID if given; either way the row is found and updated in one statement
+            condition = student_condition(session, student_id, name, year, department_name, university_name)
+            if values:
+                statement = update(students).where(condition).values(**values).returning(*student_columns())
+            else:
+                statement = student_select().where(condition)
+            row = session.connection().execute(statement).first()
+            if row is None:
+                raise StudentNotFoundError("Student not found")
+            return dict(row._mapping)
+
+        try:
+            student = write_batcher.run(update_job)
+        except StudentNotFoundError as e:
+            return jsonify({"status": "failed", "message": str(e)}), 404
+        except IntegrityError:
+            return jsonify({
+                "status": "failed",
+                "message": "A student with this name already exists in the target department and year; nothing was changed."
+            }), 409
+        except WriteRejected as e:
+            return write_rejected(e)
+        metrics.record_rows(1)
 
-            print("✅ Student updated successfully")
-            return jsonify({"status": "success", "message": "Student updated", "student": student.dict()}), 200
+        print("✅ Student updated successfully")
+        return jsonify({"status": "success", "message": "Student updated", "student": student}), 200
 
     except Exception as e:
         print(f"❌ Error updating student: {e}")
@@ -190,36 +508,108 @@ def flexible_delete_student():
         university_name = data.get("university")
         year = data.get("year")
 
+        def delete_job(session: Session):
+            condition = student_condition(session, student_id, name, year, department_name, university_name)
+            student_name = session.connection().execute(
+                delete(students).where(condition).returning(students.c.student_name)
+            ).scalar()
+            if student_name is None:
+                raise StudentNotFoundError("Student not found")
+            return student_name
+
+        try:
+            student_name = write_batcher.run(delete_job)
+        except StudentNotFoundError as e:
+            return jsonify({"status": "failed", "message": str(e)}), 404
+        except WriteRejected as e:
+            return write_rejected(e)
+        metrics.record_rows(1)
+        print("✅ Student deleted successfully")
+
+        return jsonify({"status": "success", "message": f"Deleted student '{student_name}'"}), 200
+
+    except Exception as e:
+        print(f"❌ Error deleting student: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# BATCH UPDATE STUDENTS
+@app.route("/students/batch_update", methods=["PUT"])
+def batch_update_students():
+    """Apply one UPDATE ... WHERE to every matching student; "dry_run": true only counts them"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"status": "failed", "message": "Expected a JSON object"}), 400
+        print(f"🔄 Received batch update: {data}")
+
         with get_session() as session:
-            student = None
+            criteria, error = batch_criteria(session, data)
+            if error:
+                return jsonify({"status": "failed", "message": error}), 400
 
-            if student_id:
-                student = session.get(Student, int(student_id))
-            else:
-                query = select(Student)
-                if name:
-                    query = query.where(Student.student_name.ilike(f"%{name}%"))
-                if year:
-                    query = query.where(Student.enrollment_year == year)
-                if department_name and university_name:
-                    uni = get_university_by_name(university_name)
-                    if uni:
-                        dept = get_department_by_name(department_name, uni.university_id)
-                        if dept:
-                            query = query.where(Student.department_id == dept.department_id)
-                student = session.exec(query).first()
-
-            if not student:
-                return jsonify({"status": "failed", "message": "Student not found"}), 404
+            values = {}
+            if "new_year" in data:
+                values["enrollment_year"] = data["new_year"]
+            if "new_department" in data or "new_university" in data:
+                if not (data.get("new_department") and data.get("new_university")):
+                    return jsonify({"status": "failed", "message": "new_department requires new_university"}), 400
+                uni_id = get_university_id(session, data["new_university"])
+                dept_id = get_department_id(session, data["new_department"], uni_id) if uni_id else None
+                if not dept_id:
+                    return jsonify({"status": "failed", "message": "Target department not found"}), 404
+                values["department_id"] = dept_id
+            if not values:
+                return jsonify({"status": "failed", "message": "Provide new_year or new_department and new_university"}), 400
+
+            if data.get("dry_run"):
+                matched = count_matching(session, criteria)
+                return jsonify({"status": "success", "dry_run": True, "matched": matched}), 200
+
+            try:
+                result = session.exec(
+                    update(Student).where(*criteria).values(**values).execution_options(synchronize_session=False)
+                )
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return jsonify({
+                    "status": "failed",
+                    "message": "Update would create duplicate students in the target department and year; nothing was changed."
+                }), 409
+
+            print(f"✅ Batch updated {result.rowcount} students")
+            return jsonify({"status": "success", "updated": result.rowcount}), 200
 
-            session.delete(student)
-            session.commit()
-            print("✅ Student deleted successfully")
+    except Exception as e:
+        print(f"❌ Error in batch update: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# BATCH DELETE STUDENTS
+@app.route("/students/batch_delete", methods=["DELETE"])
+def batch_delete_students():
+    """Apply one DELETE ... WHERE to every matching student; "dry_run": true only counts them"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"status": "failed", "message": "Expected a JSON object"}), 400
+        print(f"🗑️ Received batch delete: {data}")
 
-            return jsonify({"status": "success", "message": f"Deleted student '{student.student_name}'"}), 200
+        with get_session() as session:
+            criteria, error = batch_criteria(session, data)
+            if error:
+                return jsonify({"status": "failed", "message": error}), 400
+
+            if data.get("dry_run"):
+                matched = count_matching(session, criteria)
+                return jsonify({"status": "success", "dry_run": True, "matched": matched}), 200
+
+            result = session.exec(delete(Student).where(*criteria).execution_options(synchronize_session=False))
+            session.commit()
+            print(f"✅ Batch deleted {result.rowcount} students")
+            return jsonify({"status": "success", "deleted": result.rowcount}), 200
 
     except Exception as e:
-        print(f"❌ Error deleting student: {e}")
+        print(f"❌ Error in batch delete: {e}")
         return jsonify({"status": "failed", "message": str(e)}), 500
 
 # SEARCH STUDENT
@@ -231,34 +621,141 @@ def search_student():
 
         print(f"Searching student by name='{name}' or id='{student_id}'")
 
-        with get_session() as session:
-            if student_id:
-                student = session.get(Student, int(student_id))
-                if student:
-                    return jsonify({"status": "success", "student": student.dict()}), 200
-                else:
-                    return jsonify({"status": "failed", "message": "Student not found"}), 404
-
-            elif name:
-                students = session.exec(
-                    select(Student).where(Student.student_name.ilike(f"%{name}%"))
-                ).all()
-
-                if students:
-                    return jsonify({
-                        "status": "success",
-                        "results": [s.dict() for s in students]
-                    }), 200
-                else:
-                    return jsonify({"status": "failed", "message": "No students found with this name"}), 404
+        try:
+            fields = parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"status": "failed", "message": str(e)}), 400
+
+        if not student_id and name and wants_ndjson():
+            mode = request.args.get("mode", "substring")
+            if mode not in SEARCH_MODES:
+                return jsonify({"status": "failed", "message": f"'mode' must be one of {', '.join(SEARCH_MODES)}"}), 400
+            return ndjson_response(
+                lambda stream_session: iter_search_results(stream_session, name, mode, columns=student_columns(fields)), fields
+            )
+
+        # ♻️ Repeated polls are answered from the response cache while the student data is unchanged
+        representation = (fields, preferred_mimetype(request.accept_mimetypes))
+        if student_id:
+            key = ("id", int(student_id), representation)
+        else:
+            key = ("name", name, request.args.get("mode", "substring"), request.args.get("limit"), request.args.get("cursor"), representation)
+        current = response_cache.version(*SEARCH_TABLES)
+        entry = search_cache.get(key, current)
+        if entry is None:
+            response, status = find_students(name, student_id, fields)
+            if status != 200:
+                return response, status
+            entry = search_cache.put(
+                key, current, response.get_data(), response_cache.last_modified(*SEARCH_TABLES), response.mimetype
+            )
+        return cached_response(search_cache, entry)
+
+    except Exception as e:
+        print(f"❌ Error searching student: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+def find_students(name: str, student_id: str, fields=STUDENT_FIELDS):
+    if student_id and student_directory.enabled():
+        student = student_directory.get_directory().get(int(student_id))
+        if student:
+            return respond({"status": "success", "student": project(student, fields)})
+        return jsonify({"status": "failed", "message": "Student not found"}), 404
+
+    columns = student_columns(fields)
+    with get_session() as session:
+        if student_id:
+            student = session.exec(student_select(fields).where(Student.student_id == int(student_id))).first()
+            if student:
+                metrics.record_rows(1)
+                return respond({"status": "success", "student": project(student, fields)})
+            else:
+                return jsonify({"status": "failed", "message": "Student not found"}), 404
 
+        elif name:
+            mode = request.args.get("mode", "substring")
+            if mode not in SEARCH_MODES:
+                return jsonify({"status": "failed", "message": f"'mode' must be one of {', '.join(SEARCH_MODES)}"}), 400
+            try:
+                students, next_cursor = search_students(
+                    session, name, mode=mode, limit=request.args.get("limit"), cursor=request.args.get("cursor"), columns=columns
+                )
+            except ValueError as e:
+                return jsonify({"status": "failed", "message": str(e)}), 400
+
+            if students:
+                metrics.record_rows(len(students))
+                return respond({
+                    "status": "success",
+                    "results": [project(s, fields) for s in students],
+                    "next_cursor": next_cursor
+                })
             else:
-                return jsonify({"status": "failed", "message": "Provide 'name' or 'id' as query param"}), 400
+                return jsonify({"status": "failed", "message": "No students found with this name"}), 404
+
+        else:
+            return jsonify({"status": "failed", "message": "Provide 'name' or 'id' as query param"}), 400
+
+# LIST STUDENTS
+@app.route("/students", methods=["GET"])
+def list_students():
+    try:
+        try:
+            fields = parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"status": "failed", "message": str(e)}), 400
+        statement = student_select(fields)
+
+        if wants_ndjson():
+            return ndjson_response(lambda session: stream(session, statement.order_by(Student.student_id)), fields)
+
+        with get_session() as session:
+            try:
+                students, next_cursor = paginate(
+                    session, statement, Student.student_id,
+                    limit=request.args.get("limit"), cursor=request.args.get("cursor")
+                )
+            except ValueError as e:
+                return jsonify({"status": "failed", "message": str(e)}), 400
+
+            metrics.record_rows(len(students))
+            return respond({
+                "status": "success",
+                "results": [project(s, fields) for s in students],
+                "next_cursor": next_cursor
+            })
 
     except Exception as e:
-        print(f"❌ Error searching student: {e}")
+        print(f"❌ Error listing students: {e}")
         return jsonify({"status": "failed", "message": str(e)}), 500
 
+# CACHE STATS
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"status": "success", "lookup_cache": lookup_cache.stats(), "search_cache": search_cache.stats()}), 200
+
+# METRICS
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    cache = lookup_cache.stats()
+    extra = {
+        f"lookup_cache_{kind}_total": {(("cache", name),): cache[name][kind] for name in cache}
+        for kind in ("hits", "misses")
+    }
+    search = search_cache.stats()
+    for kind in ("hits", "misses", "not_modified"):
+        extra[f"response_cache_{kind}_total"] = {(("cache", "search"),): search[kind]}
+    batcher = write_batcher.stats()
+    extra["write_batches_total"] = {(): batcher["batches"]}
+    extra["write_batched_jobs_total"] = {(): batcher["writes"]}
+    extra["write_rejections_total"] = {(("reason", reason),): count for reason, count in batcher["rejected"].items()}
+    extra["write_busy_retries_total"] = {(): batcher["busy_retries"]}
+    gauges = {
+        "write_queue_depth": {(): batcher["queued"]},
+        "write_in_flight": {(): batcher["in_flight"]},
+    }
+    return Response(metrics.render(extra, gauges), mimetype="text/plain; version=0.0.4")
+
 # RUN SERVER
 if __name__ == "__main__":
     app.run(debug=True, use_reloader=False)
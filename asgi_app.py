@@ -0,0 +1,239 @@
+# asgi_app.py
+# Async twin of app.py for ASGI servers, e.g.:
+#   uvicorn asgi_app:app --workers 4
+# Routes and JSON bodies match app.py; database I/O goes through aiosqlite,
+# so a waiting request yields the event loop instead of holding a thread.
+import asyncio
+
+from quart import Quart, request, jsonify
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import RoutingSession, create_async_db_engine, create_read_engine
+from university_db import Student, init_db
+import lookup_cache
+from search import SEARCH_MODES, name_matches, search_page
+from upserts import university_upsert, department_upsert, student_insert_if_new
+
+app = Quart(__name__)
+async_engine = create_async_db_engine()
+async_read_engine = create_read_engine(asynchronous=True)
+
+# DB SESSION
+# Reads use the read-only pool; a session moves to the writer once it writes
+def get_session():
+    return AsyncSession(
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        write_engine=async_engine.sync_engine,
+        read_engine=async_read_engine.sync_engine if async_read_engine else None,
+    )
+
+# STARTUP
+# Importing this module does no I/O; each worker brings the schema up to
+# date before it serves requests.
+@app.before_serving
+async def startup():
+    await asyncio.to_thread(init_db)
+
+# HELPER FUNCTIONS
+@app.route("/")
+async def home():
+    return "University Student Management API is running (ASGI)."
+
+async def get_university_id(session: AsyncSession, name: str):
+    university_id = lookup_cache.university_ids.get(name)
+    if university_id is None:
+        connection = await session.connection()
+        university_id = (await connection.execute(lookup_cache.UNIVERSITY_ID_BY_NAME, {"name": name})).scalar()
+        if university_id is not None:
+            lookup_cache.university_ids.put(name, university_id)
+    return university_id
+
+async def get_department_id(session: AsyncSession, name: str, university_id: int):
+    department_id = lookup_cache.department_ids.get((name, university_id))
+    if department_id is None:
+        connection = await session.connection()
+        department_id = (await connection.execute(
+            lookup_cache.DEPARTMENT_ID_BY_NAME, {"name": name, "university_id": university_id}
+        )).scalar()
+        if department_id is not None:
+            lookup_cache.department_ids.put((name, university_id), department_id)
+    return department_id
+
+async def find_student(session: AsyncSession, data: dict):
+    """Resolve the student an update/delete body refers to, preferring student_id"""
+    student_id = data.get("student_id")
+    if student_id:
+        return await session.get(Student, int(student_id))
+
+    name = data.get("name")
+    department_name = data.get("department")
+    university_name = data.get("university")
+    year = data.get("year")
+
+    query = select(Student)
+    if name:
+        query = query.where(Student.student_id.in_(name_matches(name)))
+    if year:
+        query = query.where(Student.enrollment_year == year)
+    if department_name and university_name:
+        uni_id = await get_university_id(session, university_name)
+        if uni_id:
+            dept_id = await get_department_id(session, department_name, uni_id)
+            if dept_id:
+                query = query.where(Student.department_id == dept_id)
+    return (await session.exec(query)).first()
+
+# ROUTES
+
+# ADD STUDENT
+@app.route("/students/full_add", methods=["POST"])
+async def add_student_entry():
+    try:
+        data = await request.get_json()
+
+        student_name = data.get("name")
+        year = data.get("year")
+        department_name = data.get("department")
+        university_name = data.get("university")
+        location = data.get("location", "Tirupati")  # Default location
+
+        if not all([student_name, year, department_name, university_name]):
+            return jsonify({"status": "failed", "message": "All fields are required"}), 400
+
+        async with get_session() as session:
+            university_id = lookup_cache.university_ids.get(university_name)
+            if university_id is None:
+                university_id = (await session.exec(university_upsert(university_name, location))).scalar_one()
+            department_id = lookup_cache.department_ids.get((department_name, university_id))
+            if department_id is None:
+                department_id = (await session.exec(department_upsert(department_name, university_id))).scalar_one()
+            student_id = (await session.exec(
+                student_insert_if_new(student_name, year, department_id)
+            )).scalar_one_or_none()
+            if student_id is None:
+                await session.rollback()
+                return jsonify({
+                    "status": "failed",
+                    "message": f"Student '{student_name}' already exists in this department and year."
+                }), 409
+            await session.commit()
+        lookup_cache.university_ids.put(university_name, university_id)
+        lookup_cache.department_ids.put((department_name, university_id), department_id)
+
+        return jsonify({"status": "success", "message": "Student added successfully"}), 200
+
+    except Exception as e:
+        print(f"❌ Error occurred: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# FLEXIBLE UPDATE STUDENT
+@app.route("/students/update", methods=["PUT"])
+async def flexible_update_student():
+    try:
+        data = await request.get_json()
+
+        if not any([data.get(key) for key in ("student_id", "name", "department", "university", "year")]):
+            return jsonify({"status": "failed", "message": "Provide at least one identifying field"}), 400
+
+        async with get_session() as session:
+            student = await find_student(session, data)
+            if not student:
+                return jsonify({"status": "failed", "message": "Student not found"}), 404
+
+            if "new_name" in data:
+                student.student_name = data["new_name"]
+            if "new_year" in data:
+                student.enrollment_year = data["new_year"]
+            if "new_department" in data and "new_university" in data:
+                uni_id = await get_university_id(session, data["new_university"])
+                if uni_id:
+                    dept_id = await get_department_id(session, data["new_department"], uni_id)
+                    if dept_id:
+                        student.department_id = dept_id
+
+            session.add(student)
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return jsonify({
+                    "status": "failed",
+                    "message": "A student with this name already exists in the target department and year; nothing was changed."
+                }), 409
+            await session.refresh(student)
+
+            return jsonify({"status": "success", "message": "Student updated", "student": student.dict()}), 200
+
+    except Exception as e:
+        print(f"❌ Error updating student: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# FLEXIBLE DELETE STUDENT
+@app.route("/students/delete", methods=["DELETE"])
+async def flexible_delete_student():
+    try:
+        data = await request.get_json()
+
+        async with get_session() as session:
+            student = await find_student(session, data)
+            if not student:
+                return jsonify({"status": "failed", "message": "Student not found"}), 404
+
+            await session.delete(student)
+            await session.commit()
+
+            return jsonify({"status": "success", "message": f"Deleted student '{student.student_name}'"}), 200
+
+    except Exception as e:
+        print(f"❌ Error deleting student: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# SEARCH STUDENT
+@app.route("/students/search", methods=["GET"])
+async def search_student():
+    try:
+        name = request.args.get("name")
+        student_id = request.args.get("id")
+
+        async with get_session() as session:
+            if student_id:
+                student = await session.get(Student, int(student_id))
+                if student:
+                    return jsonify({"status": "success", "student": student.dict()}), 200
+                else:
+                    return jsonify({"status": "failed", "message": "Student not found"}), 404
+
+            elif name:
+                mode = request.args.get("mode", "substring")
+                if mode not in SEARCH_MODES:
+                    return jsonify({"status": "failed", "message": f"'mode' must be one of {', '.join(SEARCH_MODES)}"}), 400
+                try:
+                    statement, finish = search_page(
+                        name, mode=mode, limit=request.args.get("limit"), cursor=request.args.get("cursor")
+                    )
+                except ValueError as e:
+                    return jsonify({"status": "failed", "message": str(e)}), 400
+                students, next_cursor = finish((await session.exec(statement)).all())
+
+                if students:
+                    return jsonify({
+                        "status": "success",
+                        "results": [s.dict() for s in students],
+                        "next_cursor": next_cursor
+                    }), 200
+                else:
+                    return jsonify({"status": "failed", "message": "No students found with this name"}), 404
+
+            else:
+                return jsonify({"status": "failed", "message": "Provide 'name' or 'id' as query param"}), 400
+
+    except Exception as e:
+        print(f"❌ Error searching student: {e}")
+        return jsonify({"status": "failed", "message": str(e)}), 500
+
+# RUN SERVER
+if __name__ == "__main__":
+    app.run(debug=True, use_reloader=False)
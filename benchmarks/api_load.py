@@ -0,0 +1,104 @@
+# benchmarks/api_load.py
+"""Load test comparing the Flask app (app.py) with the ASGI app (asgi_app.py).
+
+Both stacks are started as subprocesses against their own copy of a fresh
+database and driven by the same concurrent mix of /students/full_add and
+/students/search requests. Needs httpx and uvicorn. Run from the repository
+root:
+
+    python -m benchmarks.api_load --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STACKS = {
+    "flask": lambda port: [sys.executable, "-c", f"from app import app; app.run(port={port}, threaded=True)"],
+    "asgi": lambda port: [sys.executable, "-m", "uvicorn", "asgi_app:app", "--port", str(port), "--log-level", "warning"],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+def percentile(latencies, pct: float):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def drive(base_url: str, total: int, concurrency: int):
+    """Send `total` requests with `concurrency` in flight; return (elapsed, latencies, errors)"""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            if i % 4 == 0:
+                response = await client.post("/students/full_add", json={
+                    "name": f"Load {i}", "year": 2020 + i % 5,
+                    "department": f"Dept {i % 20}", "university": f"University {i % 5}",
+                })
+            else:
+                response = await client.get("/students/search", params={"name": f"Load {i % 97}", "limit": 20})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, command in STACKS.items():
+            port = free_port()
+            env = dict(os.environ, UNIVERSITY_DATABASE_URL=f"sqlite:///{os.path.join(tmp, label + '.db')}")
+            server = subprocess.Popen(command(port), cwd=REPO_ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_port(port)
+                elapsed, latencies, errors = asyncio.run(
+                    drive(f"http://127.0.0.1:{port}", args.requests, args.concurrency)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+
+            print(
+                f"{label:6} {len(latencies) / elapsed:8.0f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                f"p95 {percentile(latencies, 95) * 1000:7.1f} ms  "
+                f"p99 {percentile(latencies, 99) * 1000:7.1f} ms  "
+                f"({errors} errors)"
+            )
@@ -0,0 +1,67 @@
+# benchmarks/engine_writes.py
+"""Write throughput of a plain create_engine() versus database.create_db_engine().
+
+Each writer thread inserts students one transaction at a time, which is the
+shape of /students/full_add traffic. Run from the repository root:
+
+    python -m benchmarks.engine_writes --writes 2000 --threads 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlmodel import Session, create_engine
+
+from database import create_db_engine
+from migrations import migrate
+from university_db import Student
+
+
+def run_writes(engine, writes: int, threads: int):
+    """Return committed writes per second"""
+    per_thread = writes // threads
+    errors = []
+
+    def writer(offset):
+        for i in range(per_thread):
+            try:
+                with Session(engine) as session:
+                    session.add(Student(student_name=f"Bench {offset}-{i}", enrollment_year=2024))
+                    session.commit()
+            except Exception as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return (per_thread * threads - len(errors)) / elapsed, len(errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, factory in [
+            ("create_engine (defaults)", lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+            ("create_db_engine (tuned)", create_db_engine),
+        ]:
+            url = f"sqlite:///{os.path.join(tmp, label.split()[0] + '.db')}"
+            engine = factory(url)
+            migrate(engine)
+            results[label] = run_writes(engine, args.writes, args.threads)
+            engine.dispose()
+
+        for label, (rate, errors) in results.items():
+            print(f"{label:28} {rate:10.0f} writes/s  ({errors} errors)")
+        baseline, tuned = (rate for rate, _ in results.values())
+        print(f"speedup: {tuned / baseline:.1f}x")
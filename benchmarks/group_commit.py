@@ -0,0 +1,71 @@
+# benchmarks/group_commit.py
+"""Write throughput of one transaction per write versus the group-commit WriteBatcher.
+
+Each writer thread submits student inserts one at a time and waits for the
+result, which is the shape of /students/full_add traffic. Run from the
+repository root:
+
+    python -m benchmarks.group_commit --writes 4000 --threads 16
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from database import create_db_engine
+from migrations import migrate
+from upserts import student_insert_if_new
+from write_batcher import WriteBatcher
+
+
+def run_writes(batcher: WriteBatcher, writes: int, threads: int):
+    """Return (committed writes per second, errors)"""
+    per_thread = writes // threads
+    errors = []
+
+    def writer(offset):
+        for i in range(per_thread):
+            try:
+                batcher.run(lambda session: session.exec(
+                    student_insert_if_new(f"Bench {offset}-{i}", 2024, None)
+                ).scalar_one())
+            except Exception as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return (per_thread * threads - len(errors)) / elapsed, len(errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=2)
+    parser.add_argument("--synchronous", default="NORMAL", help="PRAGMA synchronous for both runs (FULL shows the fsync cost)")
+    args = parser.parse_args()
+
+    from database import SQLITE_PRAGMAS
+    pragmas = dict(SQLITE_PRAGMAS, synchronous=args.synchronous)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, window in [("commit per write", 0), (f"group commit ({args.window_ms:g} ms)", args.window_ms / 1000)]:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, f'{window}.db')}", pragmas=pragmas)
+            migrate(engine)
+            batcher = WriteBatcher(engine, window=window)
+            results[label] = run_writes(batcher, args.writes, args.threads)
+            if window:
+                print(f"[INFO] {batcher.stats()}")
+            engine.dispose()
+
+        for label, (rate, errors) in results.items():
+            print(f"{label:28} {rate:10.0f} writes/s  ({errors} errors)")
+        baseline, batched = (rate for rate, _ in results.values())
+        print(f"speedup: {batched / baseline:.1f}x")
@@ -0,0 +1,71 @@
+# benchmarks/import_time.py
+"""Cold import time of every module, and a check that importing does no database I/O.
+
+Each module is imported in a fresh interpreter pointed at a database file
+that does not exist yet; if the file appears, the import touched the
+database. Exits 1 on I/O or when a module exceeds --budget-ms. Run from the
+repository root:
+
+    python -m benchmarks.import_time --repeat 5 --budget-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Every top-level module of the repository, so new ones are covered too
+MODULES = sorted(name[:-3] for name in os.listdir(REPO_ROOT) if name.endswith(".py"))
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+
+def import_once(module: str, database_path: str):
+    """Return (seconds, touched_database) for one cold import of `module`"""
+    env = dict(os.environ, UNIVERSITY_DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=REPO_ROOT)
+    env.pop("UNIVERSITY_SHARDS", None)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, module], env=env, cwd=os.path.dirname(database_path),
+        capture_output=True, text=True, check=True,
+    )
+    touched = os.path.exists(database_path)
+    if touched:
+        os.remove(database_path)
+    return float(result.stdout.strip().splitlines()[-1]), touched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when a module's median import exceeds this")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, "import_probe.db")
+        for module in args.modules:
+            timings, touched = [], False
+            for _ in range(args.repeat):
+                seconds, did_io = import_once(module, database_path)
+                timings.append(seconds * 1000)
+                touched = touched or did_io
+            median = statistics.median(timings)
+            flag = "DB I/O" if touched else ""
+            if args.budget_ms is not None and median > args.budget_ms:
+                flag = (flag + " OVER BUDGET").strip()
+            print(f"{module:24} median {median:8.1f} ms  min {min(timings):8.1f} ms  {flag}")
+            if flag:
+                failures.append(module)
+
+    if failures:
+        print(f"[ERROR] {', '.join(failures)}")
+        sys.exit(1)
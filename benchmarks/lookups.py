@@ -0,0 +1,116 @@
+# benchmarks/lookups.py
+"""Per-call cost of the name/id lookups: ORM select of whole models versus the Core fast path.
+
+The ORM variant is the original get_university_by_name / get_department_by_name /
+get_student_by_details shape: select(Model).where(...).first() hydrating a model.
+The fast path runs prebuilt Core statements on the session's connection and
+returns a scalar. Both run on one open session against a seeded temporary
+database, so the numbers are statement overhead, not connection setup. Run
+from the repository root:
+
+    python -m benchmarks.lookups --calls 5000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import bindparam, select as core_select
+from sqlmodel import Session, select
+
+from database import create_db_engine
+from lookup_cache import UNIVERSITY_ID_BY_NAME, DEPARTMENT_ID_BY_NAME
+from migrations import migrate
+from seed_data import seed
+from university_db import University, Department, Student
+
+students = Student.__table__
+
+STUDENT_ID_BY_DETAILS = (
+    core_select(students.c.student_id)
+    .where(students.c.student_name == bindparam("name"))
+    .where(students.c.enrollment_year == bindparam("year"))
+    .where(students.c.department_id == bindparam("department_id"))
+    .limit(1)
+)
+
+
+def orm_cases(session: Session):
+    return {
+        "university": lambda u, d, s: session.exec(
+            select(University).where(University.university_name == u.university_name)
+        ).first(),
+        "department": lambda u, d, s: session.exec(
+            select(Department)
+            .where(Department.department_name == d.department_name)
+            .where(Department.university_id == d.university_id)
+        ).first(),
+        "student": lambda u, d, s: session.exec(
+            select(Student)
+            .where(Student.student_name == s.student_name)
+            .where(Student.enrollment_year == s.enrollment_year)
+            .where(Student.department_id == s.department_id)
+        ).first(),
+    }
+
+def core_cases(session: Session):
+    connection = session.connection()
+    return {
+        "university": lambda u, d, s: connection.execute(
+            UNIVERSITY_ID_BY_NAME, {"name": u.university_name}
+        ).scalar(),
+        "department": lambda u, d, s: connection.execute(
+            DEPARTMENT_ID_BY_NAME, {"name": d.department_name, "university_id": d.university_id}
+        ).scalar(),
+        "student": lambda u, d, s: connection.execute(
+            STUDENT_ID_BY_DETAILS, {"name": s.student_name, "year": s.enrollment_year, "department_id": s.department_id}
+        ).scalar(),
+    }
+
+def time_case(lookup, samples):
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for university, department, student in samples:
+        lookup(university, department, student)
+    return (time.perf_counter() - start) / len(samples) * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'lookups.db')}")
+        migrate(engine)
+        with Session(engine) as session:
+            seed(session, 50, 10, args.students, args.seed)
+
+        with Session(engine) as session:
+            rng = random.Random(args.seed)
+            universities = {u.university_id: u for u in session.exec(select(University))}
+            departments = list(session.exec(select(Department)))
+            sample_students = session.exec(select(Student).limit(args.calls)).all()
+            department_by_id = {d.department_id: d for d in departments}
+            samples = []
+            for student in sample_students:
+                department = department_by_id[student.department_id]
+                samples.append((universities[department.university_id], department, student))
+            rng.shuffle(samples)
+            session.expunge_all()
+
+            variants = {"ORM": orm_cases(session), "Core": core_cases(session)}
+            for cases in variants.values():
+                time_case(cases["student"], samples[:100])  # warm the compiled cache
+
+            results = {label: {name: time_case(lookup, samples) for name, lookup in cases.items()} for label, cases in variants.items()}
+
+        engine.dispose()
+
+    print(f"{'lookup':12} {'ORM us/call':>12} {'Core us/call':>13} {'speedup':>8}")
+    for name in results["ORM"]:
+        orm, core = results["ORM"][name], results["Core"][name]
+        print(f"{name:12} {orm:12.1f} {core:13.1f} {orm / core:7.1f}x")
@@ -0,0 +1,81 @@
+# benchmarks/serialization.py
+"""Bytes and CPU per /students/search page: full ORM dicts with stdlib json versus projected columns with orjson/MessagePack.
+
+Each variant runs the search query for one page and encodes the response
+body, as the route does. CPU time is process time, so SQLite's work in the
+query counts too. Run from the repository root:
+
+    python -m benchmarks.serialization --limit 500 --repeat 50
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlmodel import Session
+
+from database import create_db_engine
+from migrations import migrate
+from search import search_students
+from seed_data import seed
+from serialization import STUDENT_FIELDS, msgpack, orjson, project, student_columns
+
+
+def stdlib_json(payload):
+    # What Flask's default provider does for jsonify()
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+
+def orjson_json(payload):
+    return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+
+def page_payload(session, name, limit, fields=None):
+    if fields is None:
+        students, next_cursor = search_students(session, name, limit=limit)
+        results = [s.dict() for s in students]
+    else:
+        students, next_cursor = search_students(session, name, limit=limit, columns=student_columns(fields))
+        results = [project(s, fields) for s in students]
+    return {"status": "success", "results": results, "next_cursor": next_cursor}
+
+def measure(engine, name, limit, repeat, fields, encode):
+    """Return (bytes per response, CPU microseconds per response)"""
+    with Session(engine) as session:
+        body = encode(page_payload(session, name, limit, fields))  # warm caches
+        start = time.process_time()
+        for _ in range(repeat):
+            body = encode(page_payload(session, name, limit, fields))
+            session.expunge_all()
+        elapsed = time.process_time() - start
+    return len(body), elapsed / repeat * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--name", default="a", help="search term (short terms match many students)")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--fields", default="student_id,student_name", help="projection for the projected variants")
+    args = parser.parse_args()
+
+    projected = tuple(args.fields.split(","))
+    variants = [("ORM objects + .dict() + json", None, stdlib_json)]
+    if orjson is not None:
+        variants.append(("all columns + orjson", STUDENT_FIELDS, orjson_json))
+        variants.append((f"fields={args.fields} + orjson", projected, orjson_json))
+    if msgpack is not None:
+        variants.append((f"fields={args.fields} + msgpack", projected, msgpack.packb))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'serialization.db')}")
+        migrate(engine)
+        with Session(engine) as session:
+            seed(session, 50, 10, args.students)
+        results = [(label, *measure(engine, args.name, args.limit, args.repeat, fields, encode)) for label, fields, encode in variants]
+        engine.dispose()
+
+    base_bytes, base_cpu = results[0][1], results[0][2]
+    print(f"{'variant':44} {'bytes':>8} {'CPU us':>9} {'bytes saved':>12} {'CPU saved':>10}")
+    for label, size, cpu in results:
+        print(f"{label:44} {size:8d} {cpu:9.0f} {1 - size / base_bytes:11.0%} {1 - cpu / base_cpu:10.0%}")
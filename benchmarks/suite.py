@@ -0,0 +1,234 @@
+# benchmarks/suite.py
+"""Benchmark every route in app.py and every helper in main.py and university_analytics.py.
+
+A fresh database is seeded with seed_data.py, then each case is timed call
+by call. Results (throughput and p50/p95/p99 latency) are printed and saved
+as JSON; pass --baseline to compare against an earlier run. Run from the
+repository root:
+
+    python -m benchmarks.suite --students 100000 --output bench.json
+    python -m benchmarks.suite --students 100000 --baseline bench.json
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+HEAVY_ITERATIONS = 5  # cases that read a whole table
+# Years no seeded student has, one per update, so an update can never move a
+# student onto another's (name, year, department) key
+FRESH_YEARS = itertools.count(3000)
+
+
+def percentile(ordered, pct: float):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def measure(operation, iterations: int):
+    latencies = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(iterations):
+            start = time.perf_counter()
+            operation(i)
+            latencies.append(time.perf_counter() - start)
+    ordered = sorted(latencies)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / sum(latencies), 2),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 4),
+    }
+
+def expect(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f"unexpected {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def route_cases(app_module, rng, student_ids, delete_ids, common_name, universities):
+    client = app_module.app.test_client()
+    return {
+        "GET /": (lambda i: expect(client.get("/"), 200), 1),
+        "POST /students/full_add": (lambda i: expect(client.post("/students/full_add", json={
+            "name": f"Bench Student {i}", "year": 2024,
+            "department": "Computer Science", "university": universities[i % len(universities)],
+        }), 200, 409), 1),
+        "POST /students/bulk_add (100 rows)": (lambda i: expect(client.post("/students/bulk_add", json=[
+            {"name": f"Bulk {i}-{j}", "year": 2025, "department": "Physics", "university": universities[j % len(universities)]}
+            for j in range(100)
+        ]), 200), 0.2),
+        "PUT /students/update (id)": (lambda i: expect(client.put("/students/update", json={
+            "student_id": rng.choice(student_ids), "new_year": next(FRESH_YEARS),
+        }), 200, 409), 1),
+        "PUT /students/update (name)": (lambda i: expect(client.put("/students/update", json={
+            "name": f"Bench Student {i}", "new_year": next(FRESH_YEARS),
+        }), 200, 404, 409), 1),
+        "DELETE /students/delete (id)": (lambda i: expect(client.delete("/students/delete", json={
+            "student_id": delete_ids.pop(),
+        }), 200), 1),
+        "PUT /students/batch_update (50 ids)": (lambda i: expect(client.put("/students/batch_update", json={
+            "student_ids": rng.sample(student_ids, 50), "new_year": next(FRESH_YEARS),
+        }), 200, 409), 0.2),
+        "PUT /students/batch_update (dry run)": (lambda i: expect(client.put("/students/batch_update", json={
+            "university": universities[i % len(universities)], "new_year": 2024, "dry_run": True,
+        }), 200), 1),
+        "DELETE /students/batch_delete (5 ids)": (lambda i: expect(client.delete("/students/batch_delete", json={
+            "student_ids": [delete_ids.pop() for _ in range(5)],
+        }), 200), 0.2),
+        "DELETE /students/batch_delete (dry run)": (lambda i: expect(client.delete("/students/batch_delete", json={
+            "name": common_name, "dry_run": True,
+        }), 200), 1),
+        "GET /students/search (id)": (lambda i: expect(client.get(f"/students/search?id={rng.choice(student_ids)}"), 200), 1),
+        "GET /students/search (substring)": (lambda i: expect(client.get(f"/students/search?name={common_name}&limit=50"), 200), 1),
+        "GET /students/search (prefix)": (lambda i: expect(client.get(f"/students/search?name={common_name}&mode=prefix&limit=50"), 200, 404), 1),
+        "GET /students/search (ranked)": (lambda i: expect(client.get(f"/students/search?name={common_name}&mode=ranked&limit=50"), 200), 1),
+        "GET /students/search (ndjson)": (lambda i: expect(client.get("/students/search?name=Bench Student 1&format=ndjson"), 200), 0.2),
+        "GET /students (page)": (lambda i: expect(client.get("/students?limit=100"), 200), 1),
+        "GET /students (fields)": (lambda i: expect(client.get("/students?limit=100&fields=student_id,student_name"), 200), 1),
+        "GET /students (msgpack)": (lambda i: expect(client.get("/students?limit=100", headers={"Accept": "application/msgpack"}), 200), 1),
+        "GET /students (ndjson, all)": (lambda i: expect(client.get("/students?format=ndjson"), 200).get_data(), 0.025),
+        "GET /cache/stats": (lambda i: expect(client.get("/cache/stats"), 200), 1),
+        "GET /metrics": (lambda i: expect(client.get("/metrics"), 200), 1),
+    }
+
+def helper_cases(module, session, rng, student_ids, department_ids, university_ids):
+    created = {"students": [], "departments": [], "universities": []}
+
+    def create_student(i):
+        created["students"].append(module.create_student(session, f"Helper {module.__name__} {i}", 2024, rng.choice(department_ids)).student_id)
+
+    def create_department(i):
+        created["departments"].append(module.create_department(session, f"Helper Dept {module.__name__} {i}", rng.choice(university_ids)).department_id)
+
+    def create_university(i):
+        created["universities"].append(module.create_university(session, f"Helper Uni {module.__name__} {i}", "Tirupati").university_id)
+
+    cases = {
+        "get_all_students": (lambda i: module.get_all_students(session), HEAVY_ITERATIONS),
+        "get_students_page": (lambda i: module.get_students_page(session, 100), 1),
+        "iter_students": (lambda i: sum(1 for _ in module.iter_students(session)), HEAVY_ITERATIONS),
+        "get_student_by_id": (lambda i: module.get_student_by_id(session, rng.choice(student_ids)), 1),
+        "create_student": (create_student, 1),
+        "update_student": (lambda i: module.update_student(session, rng.choice(student_ids), year=next(FRESH_YEARS)), 1),
+        "delete_student": (lambda i: module.delete_student(session, created["students"].pop()), 1),
+        "get_all_departments": (lambda i: module.get_all_departments(session), 1),
+        "create_department": (create_department, 1),
+        "get_all_universities": (lambda i: module.get_all_universities(session), 1),
+        "create_university": (create_university, 1),
+        "get_students_by_department": (lambda i: module.get_students_by_department(session, rng.choice(department_ids)), 1),
+        "get_departments_by_university": (lambda i: module.get_departments_by_university(session, rng.choice(university_ids)), 1),
+        "get_students_with_details": (lambda i: module.get_students_with_details(session), HEAVY_ITERATIONS),
+        "get_students_with_details (eager)": (lambda i: module.get_students_with_details(session, eager="selectin"), HEAVY_ITERATIONS),
+        "get_students_with_details_page": (lambda i: module.get_students_with_details_page(session, 100), 1),
+        "iter_students_with_details": (lambda i: sum(1 for _ in module.iter_students_with_details(session)), HEAVY_ITERATIONS),
+    }
+    if hasattr(module, "delete_university"):
+        cases.update({
+            "get_department_by_id": (lambda i: module.get_department_by_id(session, rng.choice(department_ids)), 1),
+            "update_department": (lambda i: module.update_department(session, created["departments"][i % len(created["departments"])], name=f"Renamed {i}"), 1),
+            "delete_department": (lambda i: module.delete_department(session, created["departments"].pop()), 1),
+            "get_university_by_id": (lambda i: module.get_university_by_id(session, rng.choice(university_ids)), 1),
+            "update_university": (lambda i: module.update_university(session, created["universities"][i % len(created["universities"])], location=f"City {i}"), 1),
+            "delete_university": (lambda i: module.delete_university(session, created["universities"].pop()), 1),
+        })
+    return cases
+
+
+def run(args):
+    from sqlmodel import Session, select
+
+    import seed_data
+    from database import RoutingSession
+    from university_db import Department, Student, University, init_db
+
+    engine = init_db()
+    with Session(engine) as session:
+        counts = seed_data.seed(session, args.universities, args.departments, args.students, args.seed)
+        student_ids = list(session.exec(select(Student.student_id)))
+        department_ids = list(session.exec(select(Department.department_id)))
+        university_ids = list(session.exec(select(University.university_id)))
+        university_names = list(session.exec(select(University.university_name).order_by(University.university_id)))
+
+    import app as app_module
+    import main as main_module
+    import university_analytics as analytics_module
+
+    rng = random.Random(args.seed)
+    # Single deletes take one id per iteration, batch deletes five per fifth
+    delete_ids = rng.sample(student_ids, min(len(student_ids) // 4, args.iterations * 2))
+    survivors = sorted(set(student_ids) - set(delete_ids))
+    common_name = seed_data.FIRST_NAMES[0]
+
+    results = {}
+    for name, (operation, scale) in route_cases(app_module, rng, survivors, delete_ids, common_name, university_names).items():
+        results[f"app {name}"] = measure(operation, max(1, int(args.iterations * scale)))
+    for module in (main_module, analytics_module):
+        with RoutingSession(engine) as session:
+            for name, (operation, iterations) in helper_cases(module, session, rng, survivors, department_ids, university_ids).items():
+                iterations = iterations if iterations == HEAVY_ITERATIONS else args.iterations
+                results[f"{module.__name__}.{name}"] = measure(operation, iterations)
+
+    return {
+        "meta": {
+            "seed": args.seed,
+            "rows": counts,
+            "iterations": args.iterations,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """Print p50 changes against `baseline` and return the names that regressed beyond `threshold`"""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:60} p50 {before['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms  {change:+7.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--universities", type=int, default=50)
+    parser.add_argument("--departments", type=int, default=10, help="departments per university")
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against an earlier JSON result")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before any module creates the shared engine
+        os.environ["UNIVERSITY_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        report = run(args)
+
+    for name, result in report["results"].items():
+        print(
+            f"{name:60} {result['ops_per_sec']:10.1f} ops/s  p50 {result['p50_ms']:9.3f}  "
+            f"p95 {result['p95_ms']:9.3f}  p99 {result['p99_ms']:9.3f} ms"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Saved results to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,112 @@
+# benchmarks/write_overload.py
+"""Write throughput and latency under overload, with and without admission control.
+
+Many writer threads submit student inserts back to back for a fixed time,
+which offers far more load than one SQLite writer can commit. A second
+connection can also grab the write lock periodically, standing in for
+another process, with a short busy_timeout so SQLITE_BUSY actually
+surfaces. Run from the repository root:
+
+    python -m benchmarks.write_overload --threads 200 --seconds 5 --lock-holder-ms 100
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from database import SQLITE_PRAGMAS, create_db_engine
+from migrations import migrate
+from upserts import student_insert_if_new
+from write_batcher import WriteBatcher, WriteRejected
+
+
+def percentile(ordered, pct: float):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def hold_lock(engine, hold: float, stop: threading.Event):
+    """Take the write lock for `hold` seconds, then release it for as long"""
+    while not stop.is_set():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            time.sleep(hold)
+            conn.exec_driver_sql("COMMIT")
+        time.sleep(hold)
+
+def run(batcher: WriteBatcher, threads: int, seconds: float, client_backoff: float):
+    latencies, rejected, errors = [], [], []
+    stop = time.monotonic() + seconds
+
+    def writer(offset):
+        i = 0
+        while time.monotonic() < stop:
+            i += 1
+            start = time.perf_counter()
+            try:
+                batcher.run(lambda session: session.exec(student_insert_if_new(f"Load {offset}-{i}", 2024, None)).scalar_one())
+                latencies.append(time.perf_counter() - start)
+            except WriteRejected:
+                rejected.append(time.perf_counter() - start)
+                time.sleep(client_backoff)  # a client honouring Retry-After, scaled down
+            except Exception as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    latencies.sort()
+    return {
+        "committed/s": len(latencies) / seconds,
+        "p50 ms": percentile(latencies, 50) * 1000,
+        "p99 ms": percentile(latencies, 99) * 1000,
+        "rejected": len(rejected),
+        "reject p99 ms": percentile(sorted(rejected), 99) * 1000,
+        "errors": len(errors),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--deadline-ms", type=float, default=500)
+    parser.add_argument("--lock-holder-ms", type=float, default=0, help="another connection holds the write lock this long, on and off")
+    parser.add_argument("--busy-timeout-ms", type=int, default=50)
+    parser.add_argument("--client-backoff-ms", type=float, default=100, help="how long a rejected writer waits before its next write")
+    args = parser.parse_args()
+
+    pragmas = dict(SQLITE_PRAGMAS, busy_timeout=args.busy_timeout_ms)
+    configurations = [
+        ("unbounded queue", dict(max_in_flight=1_000_000, deadline=3600, busy_retries=0)),
+        ("admission control", dict(max_in_flight=args.max_in_flight, deadline=args.deadline_ms / 1000)),
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, options in configurations:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, label.replace(' ', '_'))}.db", pragmas=pragmas)
+            migrate(engine)
+            stop = threading.Event()
+            holder = None
+            if args.lock_holder_ms:
+                # The other "process" waits patiently for the lock itself
+                holder_engine = create_db_engine(str(engine.url))
+                holder = threading.Thread(target=hold_lock, args=(holder_engine, args.lock_holder_ms / 1000, stop), daemon=True)
+                holder.start()
+            batcher = WriteBatcher(engine, **options)
+            results[label] = run(batcher, args.threads, args.seconds, args.client_backoff_ms / 1000)
+            results[label]["busy retries"] = batcher.stats()["busy_retries"]
+            stop.set()
+            if holder:
+                holder.join()
+                holder_engine.dispose()
+            engine.dispose()
+
+    columns = list(next(iter(results.values())))
+    print(f"{'':20}" + "".join(f"{column:>15}" for column in columns))
+    for label, result in results.items():
+        print(f"{label:20}" + "".join(
+            f"{value:15.1f}" if isinstance(value, float) else f"{value:15d}" for value in result.values()
+        ))
@@ -0,0 +1,180 @@
+# columnar.py
+import argparse
+import csv
+
+from sqlmodel import Session
+
+from database import RoutingSession
+from university_db import Student, Department, init_db, student_details_select
+
+try:
+    import numpy as np
+except ImportError:  # only the vectorized analytics need numpy
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only Arrow/Parquet export needs pyarrow
+    pa = None
+    pq = None
+
+# -----------------------------
+# Columnar Export
+# -----------------------------
+# The joined student/department/university rows are read from a server-side
+# cursor `chunk_size` rows at a time and turned into columns, so memory is
+# bounded by the chunk, not the table. Exports write chunk by chunk; the
+# analytics reduce each chunk with NumPy and merge the partial counts.
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+EXPORT_COLUMNS = (
+    "student_id", "student_name", "enrollment_year", "department_name",
+    "university_name", "location", "department_id", "university_id",
+)
+INTEGER_COLUMNS = ("student_id", "enrollment_year", "department_id", "university_id")
+MISSING = -1  # stands in for NULL in integer NumPy columns
+
+
+def export_select():
+    return student_details_select().add_columns(Student.department_id, Department.university_id).order_by(Student.student_id)
+
+def iter_row_chunks(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield lists of at most `chunk_size` export rows"""
+    result = session.exec(export_select().execution_options(yield_per=chunk_size))
+    for partition in result.partitions(chunk_size):
+        yield partition
+
+def iter_column_chunks(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield {column: values} per chunk; integer columns are NumPy int64 arrays with NULL as MISSING"""
+    if np is None:
+        raise ImportError("columnar analytics require numpy (pip install numpy)")
+    for rows in iter_row_chunks(session, chunk_size):
+        columns = dict(zip(EXPORT_COLUMNS, zip(*rows)))
+        for name in INTEGER_COLUMNS:
+            columns[name] = np.fromiter(
+                (MISSING if value is None else value for value in columns[name]), dtype=np.int64, count=len(rows)
+            )
+        yield columns
+
+def iter_record_batches(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield one Arrow RecordBatch per chunk"""
+    if pa is None:
+        raise ImportError("Arrow export requires pyarrow (pip install pyarrow)")
+    schema = export_schema()
+    for rows in iter_row_chunks(session, chunk_size):
+        yield pa.record_batch([list(values) for values in zip(*rows)], schema=schema)
+
+def export_schema():
+    return pa.schema([
+        ("student_id", pa.int64()),
+        ("student_name", pa.string()),
+        ("enrollment_year", pa.int64()),
+        ("department_name", pa.string()),
+        ("university_name", pa.string()),
+        ("location", pa.string()),
+        ("department_id", pa.int64()),
+        ("university_id", pa.int64()),
+    ])
+
+def export_csv(session: Session, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Write the joined rows to a CSV file and return the row count"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in iter_row_chunks(session, chunk_size):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def export_parquet(session: Session, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Write the joined rows to a Parquet file, one row group per chunk, and return the row count"""
+    if pq is None:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+    count = 0
+    with pq.ParquetWriter(path, export_schema()) as writer:
+        for batch in iter_record_batches(session, chunk_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+def export_arrow(session: Session, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Write the joined rows as an Arrow IPC stream and return the row count"""
+    if pa is None:
+        raise ImportError("Arrow export requires pyarrow (pip install pyarrow)")
+    count = 0
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, export_schema()) as writer:
+        for batch in iter_record_batches(session, chunk_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+# -----------------------------
+# Vectorized Analytics
+# -----------------------------
+def merge_counts(totals: dict, keys, counts):
+    """Add one chunk's np.unique output to the running totals"""
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        key = tuple(key) if isinstance(key, list) else key
+        totals[key] = totals.get(key, 0) + count
+
+def cohort_counts(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Get {(university_id, enrollment_year): students}"""
+    totals = {}
+    for columns in iter_column_chunks(session, chunk_size):
+        keys = np.column_stack((columns["university_id"], columns["enrollment_year"]))
+        unique, counts = np.unique(keys, axis=0, return_counts=True)
+        merge_counts(totals, unique, counts)
+    return dict(sorted(totals.items()))
+
+def year_distribution(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Get {enrollment_year: students}; students without a year are counted under MISSING"""
+    totals = {}
+    for columns in iter_column_chunks(session, chunk_size):
+        unique, counts = np.unique(columns["enrollment_year"], return_counts=True)
+        merge_counts(totals, unique, counts)
+    return dict(sorted(totals.items()))
+
+def department_ranking(session: Session, top: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Get departments ordered by headcount as dicts with ids, names and headcount"""
+    totals = {}
+    names = {}
+    for columns in iter_column_chunks(session, chunk_size):
+        unique, first_index, counts = np.unique(columns["department_id"], return_index=True, return_counts=True)
+        merge_counts(totals, unique, counts)
+        for department_id, index in zip(unique.tolist(), first_index.tolist()):
+            names.setdefault(department_id, (
+                columns["department_name"][index],
+                int(columns["university_id"][index]),
+                columns["university_name"][index],
+            ))
+
+    ranking = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        {
+            "department_id": department_id,
+            "department_name": names[department_id][0],
+            "university_id": names[department_id][1],
+            "university_name": names[department_id][2],
+            "headcount": headcount,
+        }
+        for department_id, headcount in ranking[:top]
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the joined student tables")
+    parser.add_argument("path", help="output file; the format follows the extension (.csv, .parquet, .arrow)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    exporters = {"csv": export_csv, "parquet": export_parquet, "arrow": export_arrow}
+    extension = args.path.rsplit(".", 1)[-1].lower()
+    if extension not in exporters:
+        parser.error(f"unsupported extension '.{extension}'")
+    with RoutingSession(init_db()) as session:
+        rows = exporters[extension](session, args.path, args.chunk_size)
+    print(f"[INFO] Exported {rows} students to {args.path}")
@@ -0,0 +1,188 @@
+# database.py
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.elements import TextClause
+from sqlmodel import Session, create_engine
+
+# -----------------------------
+# Shared Engine Factory
+# -----------------------------
+# Every module gets its engine from here instead of calling create_engine
+# itself. The defaults suit a production SQLite deployment and can be
+# overridden through the environment:
+#
+#   UNIVERSITY_DATABASE_URL   database URL (default sqlite:///university.db)
+#   UNIVERSITY_DB_ECHO        "1" to log every SQL statement
+#   UNIVERSITY_DB_POOL_SIZE   pooled writer connections kept open (default 2)
+#   UNIVERSITY_DB_MAX_OVERFLOW extra writer connections under load (default 3)
+#   UNIVERSITY_DB_READ_POOL_SIZE   pooled read-only connections (default 8)
+#   UNIVERSITY_DB_READ_MAX_OVERFLOW extra read-only connections (default 16)
+#
+# SQLite allows one writer at a time, so the writer pool stays small; reads
+# get their own read-only pool (see "Read/Write Routing" below).
+
+DEFAULT_DATABASE_URL = "sqlite:///university.db"
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",          # readers never block the writer
+    "synchronous": "NORMAL",        # fsync on checkpoint, not on every commit; safe with WAL
+    "busy_timeout": 5000,           # wait up to 5s for the write lock instead of failing
+    "foreign_keys": "ON",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,           # negative = KiB, i.e. 64 MB page cache per connection
+    "temp_store": "MEMORY",
+}
+
+# Read connections cannot change the journal mode and refuse writes
+READ_PRAGMAS = {name: value for name, value in SQLITE_PRAGMAS.items() if name != "journal_mode"}
+READ_PRAGMAS["query_only"] = "ON"
+
+
+def get_database_url():
+    return os.environ.get("UNIVERSITY_DATABASE_URL", DEFAULT_DATABASE_URL)
+
+def apply_sqlite_pragmas(engine, pragmas: dict = SQLITE_PRAGMAS):
+    """Run `pragmas` on every new DBAPI connection of `engine`"""
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+def create_db_engine(url: str = None, echo: bool = None, pragmas: dict = SQLITE_PRAGMAS, **options):
+    """Create an engine with the tuned defaults; extra keyword arguments go to create_engine"""
+    url = url or get_database_url()
+    if echo is None:
+        echo = os.environ.get("UNIVERSITY_DB_ECHO") == "1"
+
+    if url.startswith("sqlite") and ":memory:" not in url and url != "sqlite://":
+        options.setdefault("pool_size", int(os.environ.get("UNIVERSITY_DB_POOL_SIZE", 2)))
+        options.setdefault("max_overflow", int(os.environ.get("UNIVERSITY_DB_MAX_OVERFLOW", 3)))
+        options.setdefault("connect_args", {"check_same_thread": False})
+
+    engine = create_engine(url, echo=echo, **options)
+    if engine.dialect.name == "sqlite" and pragmas:
+        apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+def create_async_db_engine(url: str = None, echo: bool = None, pragmas: dict = SQLITE_PRAGMAS, **options):
+    """Async counterpart of create_db_engine; sqlite:// URLs are served by aiosqlite"""
+    url = url or get_database_url()
+    if url.startswith("sqlite://"):
+        url = "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if echo is None:
+        echo = os.environ.get("UNIVERSITY_DB_ECHO") == "1"
+
+    if ":memory:" not in url and not url.endswith("://"):
+        options.setdefault("pool_size", int(os.environ.get("UNIVERSITY_DB_POOL_SIZE", 2)))
+        options.setdefault("max_overflow", int(os.environ.get("UNIVERSITY_DB_MAX_OVERFLOW", 3)))
+
+    engine = create_async_engine(url, echo=echo, **options)
+    if engine.dialect.name == "sqlite" and pragmas:
+        apply_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Return the process-wide engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine()
+    return _engine
+
+
+# -----------------------------
+# Read/Write Routing
+# -----------------------------
+# The read engine opens the same file with mode=ro and PRAGMA query_only, so
+# a read can never take the write lock. Each read transaction starts with an
+# explicit BEGIN, which pins one WAL snapshot for the whole transaction
+# while the writer keeps committing. RoutingSession sends reads there and
+# switches to the writer, for the rest of its transaction, on the first
+# INSERT/UPDATE/DELETE or flush, so reads after a write see that write.
+
+def read_only_url(url: str):
+    """Return the read-only URI form of a file-backed SQLite URL, or None when there is none"""
+    url = make_url(url)
+    if not url.drivername.startswith("sqlite") or not url.database or url.database == ":memory:":
+        return None
+    database = url.database if url.database.startswith("file:") else f"file:{url.database}"
+    return url.set(database=database, query=dict(url.query, mode="ro", uri="true")).render_as_string(hide_password=False)
+
+def begin_snapshots(engine):
+    """Emit BEGIN for every transaction on `engine` (pysqlite otherwise only begins before DML)"""
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+def create_read_engine(url: str = None, echo: bool = None, asynchronous: bool = False, **options):
+    """Create the read-only engine for `url` (an aiosqlite one if `asynchronous`); None when the database cannot be opened read-only"""
+    read_url = read_only_url(url or get_database_url())
+    if read_url is None:
+        return None
+    options.setdefault("pool_size", int(os.environ.get("UNIVERSITY_DB_READ_POOL_SIZE", 8)))
+    options.setdefault("max_overflow", int(os.environ.get("UNIVERSITY_DB_READ_MAX_OVERFLOW", 16)))
+    if asynchronous:
+        engine = create_async_db_engine(read_url, echo, READ_PRAGMAS, **options)
+        begin_snapshots(engine.sync_engine)
+    else:
+        engine = create_db_engine(read_url, echo, READ_PRAGMAS, **options)
+        begin_snapshots(engine)
+    return engine
+
+def is_write(clause):
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA", "EXPLAIN"))
+    return getattr(clause, "is_dml", False)
+
+class RoutingSession(Session):
+    """Session that reads from the read-only pool until its transaction writes"""
+
+    def __init__(self, write_engine=None, read_engine=None, **options):
+        super().__init__(**options)
+        self.write_engine = write_engine or get_engine()
+        self.read_engine = read_engine if read_engine is not None else get_read_engine()
+        self.writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self.read_engine is None:
+            return self.write_engine
+        if self.writing or self._flushing or is_write(clause):
+            self.writing = True
+            return self.write_engine
+        return self.read_engine
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def end_writing(session, transaction):
+    if transaction.parent is None:
+        session.writing = False
+
+
+_read_engine = None
+_read_engine_created = False
+
+def get_read_engine():
+    """Return the process-wide read-only engine (None for in-memory databases), creating it on first use"""
+    global _read_engine, _read_engine_created
+    if not _read_engine_created:
+        with _engine_lock:
+            if not _read_engine_created:
+                _read_engine = create_read_engine()
+                _read_engine_created = True
+    return _read_engine
@@ -0,0 +1,217 @@
+# dedupe.py
+import argparse
+import csv
+import difflib
+import time
+import unicodedata
+from itertools import groupby
+from typing import NamedTuple
+
+from sqlalchemy import text
+
+# -----------------------------
+# Normalized Name Keys
+# -----------------------------
+# Every student row carries two columns derived from student_name (migration
+# 7). university_db keeps them in step on every write made through
+# SQLAlchemy; rows written by other tools are filled in by
+# backfill_name_keys(), which the offline job below runs first.
+#
+#   name_key       casefolded, diacritics stripped, whitespace collapsed:
+#                  "  RANÍ   Sharma " -> "rani sharma"
+#   name_phonetic  Soundex code of each word of name_key: "R500 S650", which
+#                  "Raani Sarma" shares
+#
+# Insert-time duplicate checks compare name_key; the offline job blocks on
+# name_phonetic.
+
+SOUNDEX_DIGITS = {
+    letter: digit
+    for digit, letters in (("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"), ("4", "l"), ("5", "mn"), ("6", "r"))
+    for letter in letters
+}
+BACKFILL_CHUNK_SIZE = 10_000
+
+MISSING_KEYS = text("SELECT student_id, student_name FROM student WHERE name_key IS NULL")
+SET_KEYS = text("UPDATE student SET name_key = :name_key, name_phonetic = :name_phonetic WHERE student_id = :student_id")
+
+
+def normalize_name(name: str):
+    """Casefold `name`, strip its diacritics and collapse its whitespace"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+def soundex(word: str):
+    """American Soundex of the a-z letters of `word` ("" when it has none)"""
+    letters = [char for char in word if "a" <= char <= "z"]
+    if not letters:
+        return ""
+    code, previous = letters[0].upper(), SOUNDEX_DIGITS.get(letters[0], "")
+    for letter in letters[1:]:
+        if letter in "hw":
+            continue  # h and w do not separate equal digits, vowels do
+        digit = SOUNDEX_DIGITS.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        previous = digit
+    return code.ljust(4, "0")
+
+def phonetic_key(name: str):
+    """Soundex of each word of the normalized name; the name key itself for names without Latin letters"""
+    key = normalize_name(name)
+    return " ".join(code for code in map(soundex, key.split()) if code) or key
+
+def name_columns(name: str):
+    """The derived name columns for `name`, for explicit Core INSERT/UPDATE values"""
+    return {"name_key": normalize_name(name), "name_phonetic": phonetic_key(name)}
+
+def backfill_name_keys(conn, chunk_size: int = BACKFILL_CHUNK_SIZE):
+    """Fill in the name keys of students that have none; returns how many were filled"""
+    rows = conn.execute(MISSING_KEYS).all()
+    for start in range(0, len(rows), chunk_size):
+        conn.execute(SET_KEYS, [
+            dict(name_columns(name), student_id=student_id) for student_id, name in rows[start:start + chunk_size]
+        ])
+    return len(rows)
+
+
+# -----------------------------
+# Offline Duplicate Detection
+# -----------------------------
+# Comparing every pair of students is quadratic: 5 * 10^11 comparisons for a
+# million rows. The job instead reads students in the order of the covering
+# index ix_student_phonetic_year_department, so each block of candidates
+# (same phonetic key, enrollment year and department) arrives together, and
+# compares names only within a block. The run is one index scan plus a few
+# comparisons per student.
+#
+# Within a block, students are taken in id order. Each one is an exact
+# duplicate of the first earlier student with the same name_key, even one
+# that was itself a near-duplicate; failing that, a near-duplicate of the
+# first earlier, kept student whose name_key is at least `threshold`
+# similar; otherwise it is kept. A block larger than `max_block` is matched
+# on exact name_key only, so one very common name cannot make the run
+# quadratic again.
+#
+# Similar is not the same: "Verma" and "Varma" are different families. Only
+# pairs with equal name keys (and, by the blocking, the same department and
+# year) are ever deleted, after the pairs are listed and confirmed; the
+# others are reported for review.
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_BLOCK = 500
+
+BLOCKS = text("""
+    SELECT student_id, name_key, name_phonetic, enrollment_year, department_id FROM student
+    WHERE name_phonetic IS NOT NULL
+    ORDER BY name_phonetic, enrollment_year, department_id
+""")
+# Re-checked at delete time, so a student renamed or moved since the scan stays
+DELETE_DUPLICATE = text("""
+    DELETE FROM student WHERE student_id = :duplicate_id AND EXISTS (
+        SELECT 1 FROM student AS kept
+        WHERE kept.student_id = :student_id AND kept.name_key = student.name_key
+            AND kept.enrollment_year IS student.enrollment_year AND kept.department_id IS student.department_id
+    )
+""")
+
+
+class DuplicatePair(NamedTuple):
+    student_id: int  # the earlier student, which is kept
+    name_key: str
+    duplicate_id: int
+    duplicate_name_key: str
+    score: float
+
+
+def similarity(a: str, b: str, threshold: float):
+    """difflib ratio of two name keys, or 0.0 as soon as a cheap upper bound is below `threshold`"""
+    if a == b:
+        return 1.0
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+def block_duplicates(block, threshold: float = DEFAULT_THRESHOLD, max_block: int = DEFAULT_MAX_BLOCK):
+    """Yield the DuplicatePairs of one block of (student_id, name_key) sorted by id"""
+    first = {}  # name_key -> id of the first student with it
+    kept = []   # (student_id, name_key) of the students that matched no earlier one
+    for student_id, key in block:
+        if key in first:
+            yield DuplicatePair(first[key], key, student_id, key, 1.0)
+            continue
+        first[key] = student_id
+        if len(block) > max_block:
+            continue
+        for kept_id, kept_key in kept:
+            score = similarity(key, kept_key, threshold)
+            if score >= threshold:
+                yield DuplicatePair(kept_id, kept_key, student_id, key, score)
+                break
+        else:
+            kept.append((student_id, key))
+
+def find_duplicates(conn, threshold: float = DEFAULT_THRESHOLD, max_block: int = DEFAULT_MAX_BLOCK):
+    """Yield DuplicatePairs for the whole student table in one ordered scan"""
+    for _, rows in groupby(conn.execute(BLOCKS), key=lambda row: tuple(row[2:])):
+        block = sorted((row[0], row[1]) for row in rows)
+        if len(block) > 1:
+            yield from block_duplicates(block, threshold, max_block)
+
+def exact_duplicates(pairs):
+    """The pairs whose name keys are equal, the only ones delete_duplicates() acts on"""
+    return [pair for pair in pairs if pair.name_key == pair.duplicate_name_key]
+
+def delete_duplicates(conn, pairs):
+    """Delete the duplicate student of each exact pair; returns how many rows went"""
+    exact = exact_duplicates(pairs)
+    if not exact:
+        return 0
+    return conn.execute(DELETE_DUPLICATE, [
+        {"student_id": pair.student_id, "duplicate_id": pair.duplicate_id} for pair in exact
+    ]).rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find near-duplicate students by blocking on their phonetic name key")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="minimum name key similarity, 0..1")
+    parser.add_argument("--max-block", type=int, default=DEFAULT_MAX_BLOCK, help="larger blocks only match exact name keys")
+    parser.add_argument("--output", help="write the duplicate pairs to this CSV file")
+    parser.add_argument("--delete", action="store_true", help="delete duplicates with an equal name key, keeping the earliest student")
+    parser.add_argument("--yes", action="store_true", help="with --delete, do not ask before deleting")
+    args = parser.parse_args()
+
+    from university_db import init_db
+
+    engine = init_db()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        backfilled = backfill_name_keys(conn)
+        pairs = list(find_duplicates(conn, args.threshold, args.max_block))
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(DuplicatePair._fields)
+            writer.writerows(pairs)
+    if backfilled:
+        print(f"[INFO] Filled in name keys for {backfilled} students")
+    for pair in pairs[:10]:
+        print(f"{pair.student_id} '{pair.name_key}' <- {pair.duplicate_id} '{pair.duplicate_name_key}' ({pair.score:.2f})")
+    print(f"[INFO] {len(pairs)} duplicate pairs found in {elapsed:.1f}s")
+
+    if args.delete:
+        exact = exact_duplicates(pairs)
+        print(f"[INFO] {len(exact)} students have the name key of an earlier student in their department and year:")
+        for pair in exact:
+            print(f"  delete {pair.duplicate_id}, keep {pair.student_id} '{pair.name_key}'")
+        if exact and (args.yes or input(f"Delete these {len(exact)} students? [y/N] ").strip().lower() in ("y", "yes")):
+            with engine.begin() as conn:
+                print(f"[INFO] {delete_duplicates(conn, exact)} students deleted")
+        else:
+            print("[INFO] Nothing deleted")
@@ -0,0 +1,107 @@
+# enrollment_summary.py
+import argparse
+
+from sqlmodel import Session, select, table, column, func, text
+from database import RoutingSession
+from university_db import University, Department, init_db
+
+# -----------------------------
+# Enrollment Summary
+# -----------------------------
+# Headcounts come from `enrollment_summary`, one row per (department, year),
+# which migration 5 creates and the student insert/update/delete triggers
+# keep current. Every report below reads O(departments x years) rows instead
+# of scanning the student table. Students without a department or year are
+# counted under id/year 0.
+
+enrollment_summary = table("enrollment_summary", column("department_id"), column("enrollment_year"), column("headcount"))
+
+REBUILD_SQL = [
+    "DELETE FROM enrollment_summary",
+    """
+    INSERT INTO enrollment_summary (department_id, enrollment_year, headcount)
+    SELECT IFNULL(department_id, 0), IFNULL(enrollment_year, 0), COUNT(*)
+    FROM student GROUP BY 1, 2
+    """,
+]
+
+
+def headcount_by_university(session: Session):
+    """Get (university_id, university_name, headcount) rows"""
+    statement = (
+        select(University.university_id, University.university_name, func.sum(enrollment_summary.c.headcount).label("headcount"))
+        .join(Department, Department.university_id == University.university_id)
+        .join(enrollment_summary, enrollment_summary.c.department_id == Department.department_id)
+        .group_by(University.university_id)
+        .order_by(University.university_id)
+    )
+    return session.exec(statement).all()
+
+def headcount_by_department(session: Session, university_id: int = None):
+    """Get (department_id, department_name, university_id, headcount) rows, optionally for one university"""
+    statement = (
+        select(
+            Department.department_id,
+            Department.department_name,
+            Department.university_id,
+            func.sum(enrollment_summary.c.headcount).label("headcount"),
+        )
+        .join(enrollment_summary, enrollment_summary.c.department_id == Department.department_id)
+        .group_by(Department.department_id)
+        .order_by(Department.department_id)
+    )
+    if university_id is not None:
+        statement = statement.where(Department.university_id == university_id)
+    return session.exec(statement).all()
+
+def headcount_by_year(session: Session, university_id: int = None, department_id: int = None):
+    """Get (enrollment_year, headcount) rows, optionally for one university or department"""
+    statement = (
+        select(enrollment_summary.c.enrollment_year, func.sum(enrollment_summary.c.headcount).label("headcount"))
+        .group_by(enrollment_summary.c.enrollment_year)
+        .order_by(enrollment_summary.c.enrollment_year)
+    )
+    if department_id is not None:
+        statement = statement.where(enrollment_summary.c.department_id == department_id)
+    if university_id is not None:
+        statement = statement.join(
+            Department, Department.department_id == enrollment_summary.c.department_id
+        ).where(Department.university_id == university_id)
+    return session.exec(statement).all()
+
+def year_over_year_growth(session: Session, university_id: int = None, department_id: int = None):
+    """Get yearly headcounts with the change against the previous year (growth is None for the first year)"""
+    growth = []
+    previous = None
+    for year, headcount in headcount_by_year(session, university_id, department_id):
+        if year == 0:
+            continue
+        growth.append({
+            "year": year,
+            "headcount": headcount,
+            "previous": previous,
+            "growth": round((headcount - previous) / previous, 4) if previous else None,
+        })
+        previous = headcount
+    return growth
+
+def rebuild_summary(session: Session):
+    """Recount the summary table from the student table, e.g. after bulk loads with triggers off"""
+    for statement in REBUILD_SQL:
+        session.exec(text(statement))
+    session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrollment summary reports")
+    parser.add_argument("command", choices=["report", "rebuild"])
+    args = parser.parse_args()
+
+    with RoutingSession(init_db()) as session:
+        if args.command == "rebuild":
+            rebuild_summary(session)
+            print("[INFO] Rebuilt enrollment summary.")
+        for row in headcount_by_university(session):
+            print(f"{row.university_name}: {row.headcount}")
+        for row in year_over_year_growth(session):
+            print(f"{row['year']}: {row['headcount']} (growth {row['growth']})")
@@ -0,0 +1,145 @@
+# lookup_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import bindparam, select as core_select
+from sqlmodel import Session, select
+from university_db import University, Department
+
+# -----------------------------
+# Name -> ID Lookup Cache
+# -----------------------------
+# Universities and departments almost never change, yet every write resolves
+# them by name. These caches keep the ids in process: university name -> id
+# and (department name, university id) -> id. Only ids that exist are cached.
+# The create/update/delete helpers in main.py and university_analytics.py
+# write through or invalidate; the TTL bounds staleness from other processes.
+
+class LookupCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached id for `key`, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate):
+        """Drop every entry whose (key, value) satisfies `predicate`"""
+        with self._lock:
+            for key in [k for k, (v, _) in self._entries.items() if predicate(k, v)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+university_ids = LookupCache()
+department_ids = LookupCache()
+
+
+# -----------------------------
+# Core Fast Path
+# -----------------------------
+# A miss only needs one id, so the lookups skip the ORM: these Core
+# statements are built once against the tables, their compiled form is
+# reused from the engine's statement cache, and they run on the session's
+# connection, returning a scalar without touching the identity map.
+universities = University.__table__
+departments = Department.__table__
+
+UNIVERSITY_ID_BY_NAME = (
+    core_select(universities.c.university_id)
+    .where(universities.c.university_name == bindparam("name"))
+    .limit(1)
+)
+DEPARTMENT_ID_BY_NAME = (
+    core_select(departments.c.department_id)
+    .where(departments.c.department_name == bindparam("name"))
+    .where(departments.c.university_id == bindparam("university_id"))
+    .limit(1)
+)
+
+
+# -----------------------------
+# Cached Lookups
+# -----------------------------
+def get_university_id(session: Session, name: str):
+    """Get university id by name, or None if it does not exist"""
+    university_id = university_ids.get(name)
+    if university_id is None:
+        university_id = session.connection().execute(UNIVERSITY_ID_BY_NAME, {"name": name}).scalar()
+        if university_id is not None:
+            university_ids.put(name, university_id)
+    return university_id
+
+def get_department_id(session: Session, name: str, university_id: int):
+    """Get department id by name within a university, or None if it does not exist"""
+    department_id = department_ids.get((name, university_id))
+    if department_id is None:
+        department_id = session.connection().execute(
+            DEPARTMENT_ID_BY_NAME, {"name": name, "university_id": university_id}
+        ).scalar()
+        if department_id is not None:
+            department_ids.put((name, university_id), department_id)
+    return department_id
+
+def warm(session: Session):
+    """Preload both caches with as many rows as they hold"""
+    for university_id, name in session.exec(
+        select(University.university_id, University.university_name).limit(university_ids.maxsize)
+    ):
+        university_ids.put(name, university_id)
+    for department_id, name, university_id in session.exec(
+        select(Department.department_id, Department.department_name, Department.university_id)
+        .limit(department_ids.maxsize)
+    ):
+        department_ids.put((name, university_id), department_id)
+
+
+# -----------------------------
+# Write-Through / Invalidation
+# -----------------------------
+def remember_university(university: University):
+    university_ids.discard(lambda key, value: value == university.university_id)
+    university_ids.put(university.university_name, university.university_id)
+
+def forget_university(university_id: int):
+    university_ids.discard(lambda key, value: value == university_id)
+    department_ids.discard(lambda key, value: key[1] == university_id)
+
+def remember_department(department: Department):
+    department_ids.discard(lambda key, value: value == department.department_id)
+    department_ids.put((department.department_name, department.university_id), department.department_id)
+
+def forget_department(department_id: int):
+    department_ids.discard(lambda key, value: value == department_id)
+
+def stats():
+    return {"universities": university_ids.stats(), "departments": department_ids.stats()}
@@ -1,8 +1,10 @@
 # university_analytics.py
-from sqlmodel import Session, select, create_engine
-from university_db import University, Department, Student
-
-engine = create_engine("sqlite:///university.db", echo=True)
+from sqlmodel import Session, select
+from sharding import open_session
+from university_db import University, Department, Student, init_db, student_details_select, student_objects_select
+import lookup_cache
+import student_directory
+from pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, paginate, stream
 
 # STUDENT FUNCTIONS
 
@@ -16,6 +18,20 @@ def get_all_students(session: Session):
         print(f"[ERROR] Failed to get students: {e}")
         return []
 
+def get_students_page(session: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Get one keyset page of students as (students, next_cursor)"""
+    try:
+        students, next_cursor = paginate(session, select(Student), Student.student_id, limit, cursor)
+        print(f"[INFO] Retrieved page of {len(students)} students.")
+        return students, next_cursor
+    except Exception as e:
+        print(f"[ERROR] Failed to get students page: {e}")
+        return [], None
+
+def iter_students(session: Session, batch_size: int = STREAM_BATCH_SIZE):
+    """Stream all students from a server-side cursor"""
+    return stream(session, select(Student).order_by(Student.student_id), batch_size)
+
 def get_student_by_id(session: Session, student_id: int):
     """Get student by ID"""
     try:
@@ -97,6 +113,7 @@ def create_department(session: Session, name: str, uni_id: int = None):
         session.add(new_dept)
         session.commit()
         session.refresh(new_dept)
+        lookup_cache.remember_department(new_dept)
         print(f"[INFO] Created department: {new_dept}")
         return new_dept
     except Exception as e:
@@ -120,6 +137,7 @@ def create_university(session: Session, name: str, location: str = None):
         session.add(new_uni)
         session.commit()
         session.refresh(new_uni)
+        lookup_cache.remember_university(new_uni)
         print(f"[INFO] Created university: {new_uni}")
         return new_uni
     except Exception as e:
@@ -129,9 +147,13 @@ def create_university(session: Session, name: str, location: str = None):
 
 # QUERY FUNCTIONS
 def get_students_by_department(session: Session, dept_id: int):
-    """Get all students in a specific department"""
+    """Get all students in a specific department (StudentRecords from the student directory when it is enabled)"""
     try:
-        students = session.exec(select(Student).where(Student.department_id == dept_id)).all()
+        directory = student_directory.for_session(session)
+        if directory is not None:
+            students = directory.in_department(dept_id)
+        else:
+            students = session.exec(select(Student).where(Student.department_id == dept_id)).all()
         print(f"[INFO] Retrieved {len(students)} students for department {dept_id}.")
         return students
     except Exception as e:
@@ -148,18 +170,34 @@ def get_departments_by_university(session: Session, uni_id: int):
         print(f"[ERROR] Failed to get departments for university {uni_id}: {e}")
         return []
 
-def get_students_with_details(session: Session):
-    """Get students with joined department and university"""
+def get_students_with_details(session: Session, eager: str = None):
+    """Get flat student/department/university rows, or Student objects with relations loaded when `eager` is set"""
     try:
-        data = session.exec(select(Student).join(Department).join(University)).all()
+        statement = student_objects_select(eager) if eager else student_details_select()
+        data = session.exec(statement).all()
         print(f"[INFO] Retrieved {len(data)} students with full details.")
         return data
     except Exception as e:
         print(f"[ERROR] Failed to get student details: {e}")
         return []
 
+def get_students_with_details_page(session: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Get one keyset page of flat student detail rows"""
+    try:
+        rows, next_cursor = paginate(session, student_details_select(), Student.student_id, limit, cursor)
+        print(f"[INFO] Retrieved page of {len(rows)} students with full details.")
+        return rows, next_cursor
+    except Exception as e:
+        print(f"[ERROR] Failed to get student details page: {e}")
+        return [], None
+
+def iter_students_with_details(session: Session, batch_size: int = STREAM_BATCH_SIZE):
+    """Stream flat student detail rows from a server-side cursor"""
+    return stream(session, student_details_select().order_by(Student.student_id), batch_size)
+
 # TEST RUN
 if __name__ == "__main__":
-    with Session(engine) as session:
+    init_db()
+    with open_session() as session:
         students = get_students_by_department(session, 1)
         print(f"Students in Department 1: {students}")
@@ -0,0 +1,273 @@
+# metrics.py
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+# -----------------------------
+# Request Instrumentation
+# -----------------------------
+# install(app, engine) records, per route: request latency, SQL statement
+# count and DB time (from engine cursor events), rows returned, and
+# session/commit counts. render() formats everything in the Prometheus text
+# exposition format for /metrics. Work done outside a request (scripts, or
+# startup inside background()) is reported under route="background".
+#
+# Routes read Core rows rather than ORM objects, so no ORM event sees them:
+# a route calls record_rows() with the number of rows it fetched and returns.
+#
+# Statements slower than UNIVERSITY_SLOW_QUERY_MS (unset = off) are printed
+# with their route.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+BACKGROUND_ROUTE = "background"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestStats:
+    __slots__ = ("route", "method", "status", "streamed", "started", "statements", "db_time", "rows", "sessions", "commits")
+
+    def __init__(self, route: str, method: str = ""):
+        self.route = route
+        self.method = method
+        self.status = 0
+        self.streamed = False
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.sessions = 0
+        self.commits = 0
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+_lock = threading.Lock()
+
+request_latency = {}       # (route, method) -> Histogram of seconds
+request_statements = {}    # (route, method) -> Histogram of statements per request
+requests_total = {}        # (route, method, status) -> count
+db_statements_total = {}   # route -> count
+db_time_total = {}         # route -> seconds
+db_rows_total = {}         # route -> rows returned
+db_sessions_total = {}     # route -> sessions begun
+db_commits_total = {}      # route -> commits
+slow_queries_total = {}    # route -> count
+
+slow_query_threshold = float(os.environ["UNIVERSITY_SLOW_QUERY_MS"]) / 1000 if os.environ.get("UNIVERSITY_SLOW_QUERY_MS") else None
+
+
+def _add(counter: dict, key, amount=1):
+    counter[key] = counter.get(key, 0) + amount
+
+def _route():
+    stats = _current.get()
+    return stats.route if stats else BACKGROUND_ROUTE
+
+def _record_db(field: str, route_counter: dict, amount=1):
+    stats = _current.get()
+    if stats is not None:
+        setattr(stats, field, getattr(stats, field) + amount)
+    else:
+        with _lock:
+            _add(route_counter, BACKGROUND_ROUTE, amount)
+
+
+# -----------------------------
+# Request Lifecycle
+# -----------------------------
+def start_request(route: str, method: str):
+    return _current.set(RequestStats(route, method))
+
+def set_status(status: int):
+    stats = _current.get()
+    if stats is not None:
+        stats.status = status
+
+def record_rows(count: int):
+    """Count `count` rows fetched from the database and returned by the current route"""
+    _record_db("rows", db_rows_total, count)
+
+@contextmanager
+def background():
+    """Attribute the work done inside to route="background", even during a request"""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+def finish_request(token=None):
+    """Fold the current request into the aggregates"""
+    stats = _current.get()
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - stats.started
+    key = (stats.route, stats.method)
+    with _lock:
+        request_latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+        request_statements.setdefault(key, Histogram(STATEMENT_BUCKETS)).observe(stats.statements)
+        _add(requests_total, (stats.route, stats.method, stats.status))
+        _add(db_statements_total, stats.route, stats.statements)
+        _add(db_time_total, stats.route, stats.db_time)
+        _add(db_rows_total, stats.route, stats.rows)
+        _add(db_sessions_total, stats.route, stats.sessions)
+        _add(db_commits_total, stats.route, stats.commits)
+    if token is not None:
+        _current.reset(token)
+    else:
+        _current.set(None)
+
+
+# -----------------------------
+# SQLAlchemy Hooks
+# -----------------------------
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+        else:
+            with _lock:
+                _add(db_statements_total, BACKGROUND_ROUTE)
+                _add(db_time_total, BACKGROUND_ROUTE, elapsed)
+        if slow_query_threshold is not None and elapsed >= slow_query_threshold:
+            with _lock:
+                _add(slow_queries_total, _route())
+            print(f"[SLOW QUERY] {elapsed * 1000:.1f} ms on {_route()}: {' '.join(statement.split())}")
+
+_session_hooks_installed = False
+
+def instrument_sessions():
+    """Count session transactions and commits for every Session"""
+    global _session_hooks_installed
+    if _session_hooks_installed:
+        return
+    _session_hooks_installed = True
+
+    @event.listens_for(OrmSession, "after_transaction_create")
+    def after_transaction_create(session, transaction):
+        if transaction.parent is None:
+            _record_db("sessions", db_sessions_total)
+
+    @event.listens_for(OrmSession, "after_commit")
+    def after_commit(session):
+        _record_db("commits", db_commits_total)
+
+def install(app, *engines):
+    """Wire the Flask request hooks and the engine/session events"""
+    from flask import request
+
+    for engine in engines:
+        if engine is not None:
+            instrument_engine(engine)
+    instrument_sessions()
+
+    @app.before_request
+    def metrics_before_request():
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        start_request(route, request.method)
+
+    @app.after_request
+    def metrics_after_request(response):
+        set_status(response.status_code)
+        stats = _current.get()
+        if stats is not None and response.is_streamed:
+            # Streamed bodies (NDJSON) run their queries after the view
+            # returns; measure them end to end, when the server closes the body
+            stats.streamed = True
+            response.call_on_close(finish_request)
+        return response
+
+    @app.teardown_request
+    def metrics_teardown_request(exc):
+        stats = _current.get()
+        if exc is not None:
+            set_status(500)
+        if stats is not None and not stats.streamed:
+            finish_request()
+
+
+# -----------------------------
+# Prometheus Exposition
+# -----------------------------
+def _labels(**labels):
+    return ",".join(f'{name}="{str(value)}"' for name, value in labels.items())
+
+def _histogram_lines(name: str, histograms: dict):
+    for (route, method), histogram in sorted(histograms.items()):
+        labels = _labels(route=route, method=method)
+        for bound, count in histogram.cumulative():
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+        yield f"{name}_sum{{{labels}}} {histogram.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {histogram.count}"
+
+def render(extra_counters: dict = None, extra_gauges: dict = None):
+    """Return every metric in Prometheus text format; extra_counters/extra_gauges map name -> {labels dict tuple: value}"""
+    lines = []
+    with _lock:
+        lines += ["# HELP http_request_duration_seconds Request latency by route.",
+                  "# TYPE http_request_duration_seconds histogram"]
+        lines += _histogram_lines("http_request_duration_seconds", request_latency)
+        lines += ["# HELP db_statements_per_request SQL statements issued per request.",
+                  "# TYPE db_statements_per_request histogram"]
+        lines += _histogram_lines("db_statements_per_request", request_statements)
+
+        lines += ["# HELP http_requests_total Requests by route, method and status.",
+                  "# TYPE http_requests_total counter"]
+        for (route, method, status), count in sorted(requests_total.items()):
+            lines.append(f"http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+
+        for name, help_text, counter in (
+            ("db_statements_total", "SQL statements executed.", db_statements_total),
+            ("db_time_seconds_total", "Time spent executing SQL.", db_time_total),
+            ("db_rows_returned_total", "Rows fetched from the database and returned.", db_rows_total),
+            ("db_sessions_total", "Database sessions begun.", db_sessions_total),
+            ("db_commits_total", "Transactions committed.", db_commits_total),
+            ("db_slow_queries_total", "Statements over the slow query threshold.", slow_queries_total),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for route, value in sorted(counter.items()):
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f"{name}{{{_labels(route=route)}}} {value}")
+
+    for kind, extra in (("counter", extra_counters), ("gauge", extra_gauges)):
+        for name, series in (extra or {}).items():
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series.items():
+                label_text = _labels(**dict(labels))
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,517 @@
+# migrations.py
+import argparse
+
+from database import create_db_engine, get_database_url
+from dedupe import backfill_name_keys
+
+# -----------------------------
+# Versioned Schema Migrations
+# -----------------------------
+# The applied version lives in SQLite's PRAGMA user_version. Every migration
+# runs in its own BEGIN IMMEDIATE transaction, so concurrent workers wait for
+# each other instead of applying the same step twice, and a migration whose
+# EXPLAIN QUERY PLAN checks fail is rolled back together with its DDL.
+#
+# A statement is SQL text or, for data changes that need Python, a callable
+# taking the connection. Each check is (query, params, expected) where
+# `expected` must appear in the query plan, e.g. "USING INDEX uq_university_name".
+
+class MigrationError(RuntimeError):
+    pass
+
+
+MIGRATIONS = [
+    {
+        "version": 1,
+        "description": "initial schema",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS university (
+                university_id INTEGER NOT NULL,
+                university_name VARCHAR NOT NULL,
+                location VARCHAR,
+                PRIMARY KEY (university_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS department (
+                department_id INTEGER NOT NULL,
+                department_name VARCHAR NOT NULL,
+                university_id INTEGER,
+                PRIMARY KEY (department_id),
+                FOREIGN KEY(university_id) REFERENCES university (university_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS student (
+                student_id INTEGER NOT NULL,
+                student_name VARCHAR NOT NULL,
+                enrollment_year INTEGER,
+                department_id INTEGER,
+                PRIMARY KEY (student_id),
+                FOREIGN KEY(department_id) REFERENCES department (department_id)
+            )
+            """,
+        ],
+        "checks": [
+            ("SELECT * FROM student WHERE student_id = ?", (1,), "USING INTEGER PRIMARY KEY"),
+        ],
+    },
+    {
+        "version": 2,
+        "description": "natural-key unique indexes",
+        # DDL only: rows that would break an index stop the migration with a
+        # report instead of being deleted. `python migrations.py
+        # --merge-duplicates` merges them, explicitly and logged
+        "statements": [
+            lambda conn: check_natural_keys(conn),
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_university_name ON university (university_name)",
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_department_name_university
+            ON department (department_name, university_id)
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_student_name_year_department
+            ON student (student_name, enrollment_year, department_id)
+            """,
+        ],
+        "checks": [
+            (
+                "SELECT university_id FROM university WHERE university_name = ?",
+                ("ABC University",),
+                "USING COVERING INDEX uq_university_name",
+            ),
+            (
+                "SELECT department_id FROM department WHERE department_name = ? AND university_id = ?",
+                ("Computer Science", 1),
+                "USING COVERING INDEX uq_department_name_university",
+            ),
+            (
+                "SELECT student_id FROM student WHERE student_name = ? AND enrollment_year = ? AND department_id = ?",
+                ("Rani", 2022, 1),
+                "USING COVERING INDEX uq_student_name_year_department",
+            ),
+        ],
+    },
+    {
+        "version": 3,
+        "description": "foreign-key lookup indexes",
+        # Both indexes cover every column of their table, so the by-parent
+        # listings never touch the table b-tree
+        "statements": [
+            """
+            CREATE INDEX IF NOT EXISTS ix_department_university_name
+            ON department (university_id, department_name)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_student_department_year_name
+            ON student (department_id, enrollment_year, student_name)
+            """,
+        ],
+        "checks": [
+            (
+                "SELECT * FROM department WHERE university_id = ?",
+                (1,),
+                "USING COVERING INDEX ix_department_university_name",
+            ),
+            (
+                "SELECT * FROM student WHERE department_id = ?",
+                (1,),
+                "USING COVERING INDEX ix_student_department_year_name",
+            ),
+            (
+                "SELECT * FROM student WHERE department_id = ? AND enrollment_year = ?",
+                (1, 2023),
+                "USING COVERING INDEX ix_student_department_year_name",
+            ),
+        ],
+    },
+    {
+        "version": 4,
+        "description": "trigram full-text index on student names",
+        # External-content FTS5 table: it stores only the trigram index and
+        # reads names back from `student`, kept current by the triggers below
+        "statements": [
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS student_name_fts USING fts5(
+                student_name,
+                content='student',
+                content_rowid='student_id',
+                tokenize='trigram'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_name_fts_insert AFTER INSERT ON student BEGIN
+                INSERT INTO student_name_fts(rowid, student_name) VALUES (new.student_id, new.student_name);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_name_fts_delete AFTER DELETE ON student BEGIN
+                INSERT INTO student_name_fts(student_name_fts, rowid, student_name)
+                VALUES ('delete', old.student_id, old.student_name);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_name_fts_update AFTER UPDATE OF student_name ON student BEGIN
+                INSERT INTO student_name_fts(student_name_fts, rowid, student_name)
+                VALUES ('delete', old.student_id, old.student_name);
+                INSERT INTO student_name_fts(rowid, student_name) VALUES (new.student_id, new.student_name);
+            END
+            """,
+            "INSERT INTO student_name_fts(student_name_fts) VALUES ('rebuild')",
+        ],
+        "checks": [
+            (
+                "SELECT rowid FROM student_name_fts WHERE student_name LIKE ?",
+                ("%ani%",),
+                "VIRTUAL TABLE INDEX 0:L",
+            ),
+            (
+                "SELECT rowid FROM student_name_fts WHERE student_name_fts MATCH ?",
+                ('"ani"',),
+                "VIRTUAL TABLE INDEX 0:M",
+            ),
+        ],
+    },
+    {
+        "version": 5,
+        "description": "enrollment summary maintained by triggers",
+        # One row per (department, year) headcount. Students without a
+        # department or year are counted under 0, because NULLs never
+        # conflict in a primary key and so could not be upserted
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS enrollment_summary (
+                department_id INTEGER NOT NULL,
+                enrollment_year INTEGER NOT NULL,
+                headcount INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (department_id, enrollment_year)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS enrollment_summary_insert AFTER INSERT ON student BEGIN
+                INSERT INTO enrollment_summary (department_id, enrollment_year, headcount)
+                VALUES (IFNULL(new.department_id, 0), IFNULL(new.enrollment_year, 0), 1)
+                ON CONFLICT (department_id, enrollment_year) DO UPDATE SET headcount = headcount + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS enrollment_summary_delete AFTER DELETE ON student BEGIN
+                UPDATE enrollment_summary SET headcount = headcount - 1
+                WHERE department_id = IFNULL(old.department_id, 0) AND enrollment_year = IFNULL(old.enrollment_year, 0);
+                DELETE FROM enrollment_summary
+                WHERE department_id = IFNULL(old.department_id, 0) AND enrollment_year = IFNULL(old.enrollment_year, 0)
+                    AND headcount <= 0;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS enrollment_summary_update
+            AFTER UPDATE OF department_id, enrollment_year ON student
+            WHEN old.department_id IS NOT new.department_id OR old.enrollment_year IS NOT new.enrollment_year
+            BEGIN
+                UPDATE enrollment_summary SET headcount = headcount - 1
+                WHERE department_id = IFNULL(old.department_id, 0) AND enrollment_year = IFNULL(old.enrollment_year, 0);
+                DELETE FROM enrollment_summary
+                WHERE department_id = IFNULL(old.department_id, 0) AND enrollment_year = IFNULL(old.enrollment_year, 0)
+                    AND headcount <= 0;
+                INSERT INTO enrollment_summary (department_id, enrollment_year, headcount)
+                VALUES (IFNULL(new.department_id, 0), IFNULL(new.enrollment_year, 0), 1)
+                ON CONFLICT (department_id, enrollment_year) DO UPDATE SET headcount = headcount + 1;
+            END
+            """,
+            """
+            INSERT OR REPLACE INTO enrollment_summary (department_id, enrollment_year, headcount)
+            SELECT IFNULL(department_id, 0), IFNULL(enrollment_year, 0), COUNT(*)
+            FROM student GROUP BY 1, 2
+            """,
+        ],
+        "checks": [
+            (
+                "SELECT enrollment_year, headcount FROM enrollment_summary WHERE department_id = ?",
+                (1,),
+                "USING PRIMARY KEY",
+            ),
+        ],
+    },
+    {
+        "version": 6,
+        "description": "student change log for polling read models",
+        # One row per changed student, moved to a new seq on every write, so
+        # "WHERE seq > last_seen" returns each changed (or deleted) student
+        # once and the table never holds more rows than students ever written
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS student_change (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id INTEGER NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_change_insert AFTER INSERT ON student BEGIN
+                INSERT OR REPLACE INTO student_change (student_id) VALUES (new.student_id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_change_update AFTER UPDATE ON student BEGIN
+                INSERT OR REPLACE INTO student_change (student_id) SELECT old.student_id WHERE old.student_id IS NOT new.student_id;
+                INSERT OR REPLACE INTO student_change (student_id) VALUES (new.student_id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS student_change_delete AFTER DELETE ON student BEGIN
+                INSERT OR REPLACE INTO student_change (student_id) VALUES (old.student_id);
+            END
+            """,
+        ],
+        "checks": [
+            (
+                "SELECT student_id FROM student_change WHERE seq > ? ORDER BY seq",
+                (0,),
+                "USING INTEGER PRIMARY KEY",
+            ),
+        ],
+    },
+    {
+        "version": 7,
+        "description": "normalized and phonetic name keys for duplicate detection",
+        # The keys are computed in Python (dedupe.py), so existing rows are
+        # backfilled before the indexes are built over them. The phonetic
+        # index also holds name_key, so the offline dedupe scan never reads
+        # the table b-tree, and migration 3's listing index is rebuilt with
+        # the new columns so it still covers whole student rows
+        "statements": [
+            "ALTER TABLE student ADD COLUMN name_key VARCHAR",
+            "ALTER TABLE student ADD COLUMN name_phonetic VARCHAR",
+            backfill_name_keys,
+            "DROP INDEX IF EXISTS ix_student_department_year_name",
+            """
+            CREATE INDEX ix_student_department_year_name
+            ON student (department_id, enrollment_year, student_name, name_key, name_phonetic)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_student_name_key_year_department
+            ON student (name_key, enrollment_year, department_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_student_phonetic_year_department
+            ON student (name_phonetic, enrollment_year, department_id, name_key)
+            """,
+        ],
+        "checks": [
+            (
+                "SELECT 1 FROM student WHERE name_key = ? AND enrollment_year = ? AND department_id = ?",
+                ("rani", 2022, 1),
+                "USING COVERING INDEX ix_student_name_key_year_department",
+            ),
+            (
+                "SELECT student_id, name_key, name_phonetic, enrollment_year, department_id FROM student"
+                " WHERE name_phonetic IS NOT NULL ORDER BY name_phonetic, enrollment_year, department_id",
+                (),
+                "USING COVERING INDEX ix_student_phonetic_year_department",
+            ),
+            (
+                "SELECT * FROM student WHERE department_id = ?",
+                (1,),
+                "USING COVERING INDEX ix_student_department_year_name",
+            ),
+            (
+                "SELECT name_key, name_phonetic FROM student WHERE department_id = ? AND enrollment_year = ?",
+                (1, 2023),
+                "USING COVERING INDEX ix_student_department_year_name",
+            ),
+        ],
+    },
+]
+
+LATEST_VERSION = MIGRATIONS[-1]["version"]
+
+
+# -----------------------------
+# Natural-Key Duplicates
+# -----------------------------
+# Older databases can hold several rows per natural key, which the unique
+# indexes of migration 2 cannot be built over. Migration 2 only reports
+# them; merge_duplicates() folds each group into its lowest id, repointing
+# departments and students first, and is only run on request.
+#
+# Each query returns (key, comma-separated ids) per clashing group. NULLs
+# never clash in a unique index, so rows with a NULL key column are left out.
+
+NATURAL_KEY_DUPLICATES = {
+    "university": """
+        SELECT university_name, GROUP_CONCAT(university_id) FROM university
+        GROUP BY university_name HAVING COUNT(*) > 1
+    """,
+    "department": """
+        SELECT department_name || ' (university ' || university_id || ')', GROUP_CONCAT(department_id) FROM department
+        WHERE university_id IS NOT NULL
+        GROUP BY department_name, university_id HAVING COUNT(*) > 1
+    """,
+    "student": """
+        SELECT student_name || ' (' || enrollment_year || ', department ' || department_id || ')', GROUP_CONCAT(student_id)
+        FROM student WHERE enrollment_year IS NOT NULL AND department_id IS NOT NULL
+        GROUP BY student_name, enrollment_year, department_id HAVING COUNT(*) > 1
+    """,
+}
+
+MERGE_DUPLICATES = [
+    (
+        "departments repointed to the first of their university's duplicates",
+        """
+        UPDATE department SET university_id = (
+            SELECT MIN(u2.university_id) FROM university u1
+            JOIN university u2 ON u2.university_name = u1.university_name
+            WHERE u1.university_id = department.university_id
+        ) WHERE university_id IS NOT NULL AND university_id != (
+            SELECT MIN(u2.university_id) FROM university u1
+            JOIN university u2 ON u2.university_name = u1.university_name
+            WHERE u1.university_id = department.university_id
+        )
+        """,
+    ),
+    (
+        "duplicate universities deleted",
+        """
+        DELETE FROM university WHERE university_id NOT IN (
+            SELECT MIN(university_id) FROM university GROUP BY university_name
+        )
+        """,
+    ),
+    (
+        "students repointed to the first of their department's duplicates",
+        """
+        UPDATE student SET department_id = (
+            SELECT MIN(d2.department_id) FROM department d1
+            JOIN department d2 ON d2.department_name = d1.department_name
+                AND d2.university_id IS d1.university_id
+            WHERE d1.department_id = student.department_id
+        ) WHERE department_id IS NOT NULL AND department_id != (
+            SELECT MIN(d2.department_id) FROM department d1
+            JOIN department d2 ON d2.department_name = d1.department_name
+                AND d2.university_id IS d1.university_id
+            WHERE d1.department_id = student.department_id
+        )
+        """,
+    ),
+    (
+        "duplicate departments deleted",
+        """
+        DELETE FROM department WHERE university_id IS NOT NULL AND department_id NOT IN (
+            SELECT MIN(department_id) FROM department GROUP BY department_name, university_id
+        )
+        """,
+    ),
+    (
+        "duplicate students deleted",
+        """
+        DELETE FROM student
+        WHERE enrollment_year IS NOT NULL AND department_id IS NOT NULL AND student_id NOT IN (
+            SELECT MIN(student_id) FROM student GROUP BY student_name, enrollment_year, department_id
+        )
+        """,
+    ),
+]
+
+
+def find_natural_key_duplicates(conn):
+    """Return {table: [(key, ids), ...]} for every natural-key group with more than one row"""
+    found = {}
+    for table, query in NATURAL_KEY_DUPLICATES.items():
+        groups = [(key, ids) for key, ids in conn.exec_driver_sql(query)]
+        if groups:
+            found[table] = groups
+    return found
+
+def check_natural_keys(conn, shown: int = 10):
+    """Raise MigrationError listing the rows that would break migration 2's unique indexes"""
+    found = find_natural_key_duplicates(conn)
+    if not found:
+        return
+    lines = []
+    for table, groups in found.items():
+        lines.append(f"  {table}: {len(groups)} duplicated keys")
+        lines.extend(f"    {key!r}: ids {ids}" for key, ids in groups[:shown])
+        if len(groups) > shown:
+            lines.append(f"    ... and {len(groups) - shown} more")
+    raise MigrationError(
+        "Migration 2: natural keys are not unique, so the unique indexes cannot be created:\n"
+        + "\n".join(lines)
+        + "\nReview them, then run `python migrations.py --merge-duplicates` to keep the lowest id of each group."
+    )
+
+def merge_duplicates(engine):
+    """Merge natural-key duplicates into their lowest id, logging every step; returns rows changed per step"""
+    migrate(engine, target=1)  # the tables to merge
+    changed = {}
+    with engine.begin() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        for table, groups in find_natural_key_duplicates(conn).items():
+            for key, ids in groups:
+                print(f"[INFO] Duplicate {table} {key!r}: ids {ids}")
+        for description, statement in MERGE_DUPLICATES:
+            changed[description] = conn.exec_driver_sql(statement).rowcount
+            print(f"[INFO] {changed[description]} {description}")
+    return changed
+
+
+def get_schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def check_query_plans(conn, migration):
+    """Raise MigrationError unless every hot lookup of the migration uses its index"""
+    for query, params, expected in migration["checks"]:
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}", params)]
+        if not any(expected in detail for detail in plan):
+            raise MigrationError(
+                f"Migration {migration['version']}: expected '{expected}' for {query!r}, got {plan}"
+            )
+
+def migrate(engine, target: int = LATEST_VERSION):
+    """Apply every pending migration up to `target` and return the versions applied"""
+    applied = []
+    for migration in MIGRATIONS:
+        if migration["version"] > target:
+            break
+        with engine.begin() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            if get_schema_version(conn) >= migration["version"]:
+                continue
+            for statement in migration["statements"]:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.exec_driver_sql(statement)
+            check_query_plans(conn, migration)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(migration['version'])}")
+        applied.append(migration["version"])
+        print(f"[INFO] Applied migration {migration['version']}: {migration['description']}")
+    return applied
+
+def verify(engine):
+    """Re-run the query plan checks of every applied migration"""
+    with engine.connect() as conn:
+        version = get_schema_version(conn)
+        for migration in MIGRATIONS:
+            if migration["version"] <= version:
+                check_query_plans(conn, migration)
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or verify university.db schema migrations")
+    parser.add_argument("database_url", nargs="?", default=get_database_url(), help="default: $UNIVERSITY_DATABASE_URL or sqlite:///university.db")
+    parser.add_argument("--check", action="store_true", help="only verify the query plans of applied migrations")
+    parser.add_argument(
+        "--merge-duplicates", action="store_true",
+        help="before migrating, merge rows sharing a natural key into the lowest id (deletes the others)",
+    )
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url)
+    if args.merge_duplicates:
+        merge_duplicates(engine)
+    if args.check:
+        print(f"Schema version {verify(engine)}: all query plan checks passed")
+    else:
+        migrate(engine)
+        print(f"Schema is at version {LATEST_VERSION}")
@@ -0,0 +1,77 @@
+# pagination.py
+import base64
+import json
+
+from sqlmodel import Session
+
+# -----------------------------
+# Keyset Pagination
+# -----------------------------
+# Pages are addressed by the last key seen rather than an OFFSET, so every
+# page is an index seek (`WHERE key > :after ORDER BY key LIMIT n`) no matter
+# how deep the client has paged. Cursors are opaque to clients.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+
+def encode_cursor(position: dict):
+    """Turn a resume position into an opaque cursor string"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError for tampered cursors"""
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+def cursor_int(position: dict, name: str, default: int = None):
+    """The integer `name` of a decoded cursor position; raises ValueError for tampered cursors"""
+    try:
+        return int(position.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def clamp_limit(limit, default: int = DEFAULT_PAGE_SIZE):
+    """Parse a client supplied page size and keep it within MAX_PAGE_SIZE"""
+    if limit in (None, ""):
+        return default
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit '{limit}'")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def keyset_page(statement, key_column, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Return (page_statement, limit): `statement` seeked past the cursor, ordered by `key_column`"""
+    limit = clamp_limit(limit)
+    position = decode_cursor(cursor)
+    if "after" in position:
+        statement = statement.where(key_column > cursor_int(position, "after"))
+    return statement.order_by(key_column).limit(limit + 1), limit
+
+def split_page(rows, key_column, limit: int):
+    """Trim the look-ahead row fetched by keyset_page and build the next cursor"""
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor({"after": getattr(rows[limit - 1], key_column.key)})
+    return rows, None
+
+def paginate(session: Session, statement, key_column, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Return (rows, next_cursor) for one page of `statement` ordered by the unique `key_column`"""
+    statement, limit = keyset_page(statement, key_column, limit, cursor)
+    return split_page(session.exec(statement).all(), key_column, limit)
+
+def stream(session: Session, statement, batch_size: int = STREAM_BATCH_SIZE):
+    """Yield the rows of `statement` from a server-side cursor, `batch_size` rows in memory at a time"""
+    result = session.exec(statement.execution_options(yield_per=batch_size))
+    for row in result:
+        yield row
@@ -0,0 +1,167 @@
+# response_cache.py
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+
+# -----------------------------
+# Table Data Versions
+# -----------------------------
+# Every table has an in-process version counter. It goes up after each
+# commit that wrote the table. Writes are seen at the engine level, so every
+# write path counts without calling anything: the ORM helpers in main.py and
+# university_analytics.py, the Core statements in app.py, the group-commit
+# writer, and trigger-maintained tables named in a statement.
+#
+# Tables written on a connection are collected as statements run and
+# bumped by the session's after_commit. The bump is never early: a
+# response built from pre-commit data cannot be cached under the new
+# version. A rollback drops the collected tables.
+
+_DML_TARGET = re.compile(r'\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+"?(\w+)', re.IGNORECASE)
+
+_versions = {}
+_modified = {}
+_versions_lock = threading.Lock()
+_started = time.time()
+
+
+def version(*tables):
+    """Current versions of `tables`, usable as part of a cache key"""
+    return tuple(_versions.get(table, 0) for table in tables)
+
+def last_modified(*tables):
+    """Wall-clock time of the latest bump of any of `tables` (process start if never written)"""
+    return max((_modified.get(table, _started) for table in tables), default=_started)
+
+def bump(*tables):
+    now = time.time()
+    with _versions_lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+            _modified[table] = now
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def collect_written_table(conn, cursor, statement, parameters, context, executemany):
+    match = _DML_TARGET.match(statement)
+    if match:
+        conn.info.setdefault("written_tables", set()).add(match.group(1))
+
+@event.listens_for(OrmSession, "after_begin")
+def track_connection(session, transaction, connection):
+    connection.info["written_tables"] = set()
+    session.info.setdefault("write_connections", {})[id(connection.info)] = connection.info
+
+@event.listens_for(OrmSession, "after_commit")
+def bump_written_tables(session):
+    if session.in_nested_transaction():
+        return  # a released SAVEPOINT; its writes count when the outer transaction commits
+    tables = set()
+    for info in session.info.pop("write_connections", {}).values():
+        tables |= info.pop("written_tables", set())
+    if tables:
+        bump(*tables)
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def drop_written_tables(session, previous_transaction):
+    if not session.in_transaction():
+        for info in session.info.pop("write_connections", {}).values():
+            info.pop("written_tables", None)
+
+
+# -----------------------------
+# Conditional-GET Response Cache
+# -----------------------------
+# Holds serialized bodies of hot GET responses, keyed on the normalized query
+# and valid for the data versions they were built from. A hit answers
+# If-None-Match / If-Modified-Since with 304, or replays the stored body,
+# without opening a session.
+#
+# Versions are per process, so writes made by another process are only
+# seen once an entry is older than its TTL. The ETag is a hash of the body:
+# a rebuilt, unchanged response keeps its ETag and Last-Modified, so
+# clients still get their 304.
+#
+#   UNIVERSITY_RESPONSE_CACHE_SIZE  entries kept (default 1024, 0 = off)
+#   UNIVERSITY_RESPONSE_CACHE_TTL   seconds an entry is trusted (default 5)
+
+class CachedResponse:
+    __slots__ = ("version", "body", "mimetype", "etag", "last_modified", "expires")
+
+    def __init__(self, version, body: bytes, mimetype: str, etag: str, last_modified: float, expires: float):
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    @property
+    def last_modified_header(self):
+        return formatdate(self.last_modified, usegmt=True)
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self.maxsize = int(os.environ.get("UNIVERSITY_RESPONSE_CACHE_SIZE", 1024)) if maxsize is None else maxsize
+        self.ttl = float(os.environ.get("UNIVERSITY_RESPONSE_CACHE_TTL", 5)) if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, current_version):
+        """Return the entry for `key` if it was built at `current_version` and has not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != current_version or entry.expires < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, current_version, body: bytes, modified: float, mimetype: str = "application/json"):
+        """Store `body` and return its entry; an unchanged body keeps its ETag and Last-Modified"""
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous.etag == etag:
+                modified = previous.last_modified
+            elif previous is not None:
+                # Last-Modified has whole-second resolution: a body changed
+                # within the second of the previous one must still compare
+                # newer, or If-Modified-Since alone would get a false 304
+                modified = max(modified, int(previous.last_modified) + 1)
+            entry = CachedResponse(current_version, body, mimetype, etag, modified, time.monotonic() + self.ttl)
+            if self.maxsize > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return entry
+
+    def is_not_modified(self, entry: CachedResponse, if_none_match: str = None, if_modified_since: float = None):
+        """RFC 9110 validator check: If-None-Match wins over If-Modified-Since"""
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            matched = "*" in tags or entry.etag in tags
+        else:
+            matched = if_modified_since is not None and int(entry.last_modified) <= if_modified_since
+        if matched:
+            with self._lock:
+                self.not_modified += 1
+        return matched
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
@@ -0,0 +1,85 @@
+# search.py
+from sqlalchemy import select as select_rows  # Row results even for one column, unlike sqlmodel's select
+from sqlmodel import Session, select, table, column, literal_column, text
+from university_db import Student
+from pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, clamp_limit, cursor_int, decode_cursor, encode_cursor, keyset_page, split_page, stream
+
+# -----------------------------
+# Student Name Search
+# -----------------------------
+# Names are indexed by the `student_name_fts` FTS5 table (trigram tokenizer,
+# created by migration 4 and kept in sync with `student` by triggers). The
+# trigram index answers LIKE '%x%' and LIKE 'x%' patterns, case-insensitively,
+# whenever the pattern holds at least three characters; shorter patterns
+# still work but scan the index.
+
+student_name_fts = table("student_name_fts", column("rowid"), column("student_name"), column("rank"))
+
+SEARCH_MODES = ("substring", "prefix", "ranked")
+
+
+def fts_phrase(name: str):
+    """Quote a user string as a single FTS5 phrase"""
+    return '"' + name.replace('"', '""') + '"'
+
+def name_matches(name: str, mode: str = "substring"):
+    """Subquery of student ids whose name matches `name`, for use in Student.student_id.in_(...)"""
+    if mode == "prefix":
+        condition = student_name_fts.c.student_name.like(f"{name}%")
+    else:
+        condition = student_name_fts.c.student_name.like(f"%{name}%")
+    return select(student_name_fts.c.rowid).where(condition)
+
+def ranked_statement(name: str, columns=None):
+    """Students (or just `columns` of them) matching `name`, best bm25 rank first"""
+    return (
+        (select_rows(*columns) if columns else select(Student))
+        .join(student_name_fts, student_name_fts.c.rowid == Student.student_id)
+        .where(literal_column("student_name_fts").match(fts_phrase(name)))
+        .order_by(student_name_fts.c.rank, Student.student_id)
+    )
+
+def uses_ranking(name: str, mode: str):
+    """Ranking needs a full trigram to MATCH against; shorter terms fall back to substring order"""
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'")
+    return mode == "ranked" and len(name) >= 3
+
+def search_page(name: str, mode: str = "substring", limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, columns=None):
+    """Return (statement, finish) for one page; finish(rows) gives (students, next_cursor), or rows of `columns` (incl. student_id)"""
+    if not uses_ranking(name, mode):
+        statement = (select_rows(*columns) if columns else select(Student)).where(Student.student_id.in_(name_matches(name, mode)))
+        statement, limit = keyset_page(statement, Student.student_id, limit, cursor)
+        return statement, lambda rows: split_page(rows, Student.student_id, limit)
+
+    # Rank order has no unique monotonic key to seek on, so ranked pages
+    # resume by offset
+    limit = clamp_limit(limit)
+    offset = cursor_int(decode_cursor(cursor), "offset", 0)
+
+    def finish(rows):
+        next_cursor = encode_cursor({"offset": offset + limit}) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+    return ranked_statement(name, columns).offset(offset).limit(limit + 1), finish
+
+def search_students(session: Session, name: str, mode: str = "substring", limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, columns=None):
+    """Return (students, next_cursor) for one page of name matches"""
+    statement, finish = search_page(name, mode, limit, cursor, columns)
+    return finish(session.exec(statement).all())
+
+def iter_search_results(session: Session, name: str, mode: str = "substring", batch_size: int = STREAM_BATCH_SIZE, columns=None):
+    """Yield every name match from a server-side cursor"""
+    if uses_ranking(name, mode):
+        statement = ranked_statement(name, columns)
+    else:
+        statement = (
+            (select_rows(*columns) if columns else select(Student))
+            .where(Student.student_id.in_(name_matches(name, mode)))
+            .order_by(Student.student_id)
+        )
+    return stream(session, statement, batch_size)
+
+def rebuild_search_index(session: Session):
+    """Repopulate the FTS index from the student table"""
+    session.exec(text("INSERT INTO student_name_fts(student_name_fts) VALUES ('rebuild')"))
+    session.commit()
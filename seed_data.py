@@ -0,0 +1,128 @@
+# seed_data.py
+import argparse
+import random
+import time
+
+from sqlmodel import Session, insert, select, func
+from university_db import University, Department, Student, init_db
+
+# -----------------------------
+# Synthetic Data Generator
+# -----------------------------
+# Fills an empty database with N universities, their departments and
+# students. The same seed always produces the same rows (and, on an empty
+# database, the same ids). Names are drawn with Zipf-like weights so a few
+# names are very common and most are rare, as in real enrolment data.
+
+CITIES = [
+    "Delhi", "Mumbai", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Pune", "Ahmedabad",
+    "Jaipur", "Lucknow", "Tirupati", "Kochi", "Bhopal", "Indore", "Nagpur", "Patna",
+    "Chandigarh", "Coimbatore", "Visakhapatnam", "Mysuru", "Guwahati", "Bhubaneswar", "Vijayawada", "Madurai",
+]
+UNIVERSITY_KINDS = ["University", "Institute of Technology", "Central University", "Agricultural University", "Medical College"]
+DEPARTMENTS = [
+    "Computer Science", "Mechanical Engineering", "Electrical Engineering", "Civil Engineering",
+    "Electronics and Communication", "Chemical Engineering", "Biotechnology", "Mathematics",
+    "Physics", "Chemistry", "Economics", "Commerce", "English", "History", "Political Science",
+    "Psychology", "Management Studies", "Architecture", "Pharmacy", "Law",
+]
+FIRST_NAMES = [
+    "Aarav", "Priya", "Rahul", "Sneha", "Rani", "Bharathi", "Bhavana", "Monica", "Arjun", "Divya",
+    "Karthik", "Lakshmi", "Vikram", "Ananya", "Rohan", "Kavya", "Sai", "Meera", "Aditya", "Pooja",
+    "Naveen", "Swathi", "Harsha", "Keerthi", "Suresh", "Deepika", "Manoj", "Revathi", "Ganesh", "Sowmya",
+    "Ravi", "Anjali", "Kiran", "Nandini", "Varun", "Shreya", "Ajay", "Madhuri", "Teja", "Harini",
+]
+LAST_NAMES = [
+    "Sharma", "Reddy", "Kumar", "Rao", "Naidu", "Patel", "Iyer", "Singh", "Gupta", "Nair",
+    "Verma", "Das", "Menon", "Joshi", "Pillai", "Chowdary", "Mehta", "Bose", "Shetty", "Varma",
+]
+INITIALS = "ABCDEGHJKLMNPRSTV"
+
+DEFAULT_SEED = 42
+INSERT_CHUNK_SIZE = 10_000
+
+
+def zipf_weights(count: int, exponent: float = 1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+def generate_universities(rng: random.Random, count: int):
+    rows = []
+    for i in range(count):
+        city = CITIES[i % len(CITIES)]
+        kind = UNIVERSITY_KINDS[(i // len(CITIES)) % len(UNIVERSITY_KINDS)]
+        suffix = f" {i // (len(CITIES) * len(UNIVERSITY_KINDS)) + 1}" if i >= len(CITIES) * len(UNIVERSITY_KINDS) else ""
+        rows.append({"university_name": f"{city} {kind}{suffix}", "location": city})
+    rng.shuffle(rows)
+    return rows
+
+def generate_departments(rng: random.Random, university_ids, per_university: int):
+    per_university = min(per_university, len(DEPARTMENTS))
+    return [
+        {"department_name": name, "university_id": university_id}
+        for university_id in university_ids
+        for name in rng.sample(DEPARTMENTS, per_university)
+    ]
+
+def generate_students(rng: random.Random, department_ids, count: int, first_year: int = 2015, last_year: int = 2025):
+    """Yield student rows; department sizes and names both follow Zipf-like weights"""
+    first_weights = zipf_weights(len(FIRST_NAMES))
+    last_weights = zipf_weights(len(LAST_NAMES))
+    department_weights = zipf_weights(len(department_ids), exponent=0.6)
+    years = list(range(first_year, last_year + 1))
+    year_weights = [1 + i * 0.15 for i in range(len(years))]  # enrolment grows over time
+
+    for _ in range(count):
+        first = rng.choices(FIRST_NAMES, first_weights)[0]
+        last = rng.choices(LAST_NAMES, last_weights)[0]
+        # Half the students carry a middle initial, which keeps natural-key
+        # clashes rare even at millions of rows
+        initial = f" {rng.choice(INITIALS)}." if rng.random() < 0.5 else ""
+        yield {
+            "student_name": f"{first}{initial} {last}",
+            "enrollment_year": rng.choices(years, year_weights)[0],
+            "department_id": rng.choices(department_ids, department_weights)[0],
+        }
+
+def insert_chunks(session: Session, model, rows, chunk_size: int = INSERT_CHUNK_SIZE):
+    """Multi-row INSERT OR IGNORE; natural-key clashes from random draws are skipped"""
+    statement = insert(model.__table__).prefix_with("OR IGNORE")
+    chunk = []
+    inserted = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            inserted += session.connection().execute(statement, chunk).rowcount
+            chunk = []
+    if chunk:
+        inserted += session.connection().execute(statement, chunk).rowcount
+    return inserted
+
+def seed(session: Session, universities: int, departments_per_university: int, students: int, seed_value: int = DEFAULT_SEED):
+    """Fill an empty database and return the inserted row counts"""
+    if session.exec(select(func.count()).select_from(Student)).one():
+        raise ValueError("seed() expects an empty database")
+    rng = random.Random(seed_value)
+
+    insert_chunks(session, University, generate_universities(rng, universities))
+    university_ids = list(session.exec(select(University.university_id).order_by(University.university_id)))
+
+    insert_chunks(session, Department, generate_departments(rng, university_ids, departments_per_university))
+    department_ids = list(session.exec(select(Department.department_id).order_by(Department.department_id)))
+
+    student_count = insert_chunks(session, Student, generate_students(rng, department_ids, students))
+    session.commit()
+    return {"universities": len(university_ids), "departments": len(department_ids), "students": student_count}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill an empty database with deterministic synthetic data")
+    parser.add_argument("--universities", type=int, default=50)
+    parser.add_argument("--departments", type=int, default=10, help="departments per university")
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with Session(init_db()) as session:
+        counts = seed(session, args.universities, args.departments, args.students, args.seed)
+    print(f"[INFO] Seeded {counts} in {time.perf_counter() - start:.1f}s")
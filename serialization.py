@@ -0,0 +1,101 @@
+# serialization.py
+import os
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from university_db import Student
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # only MessagePack responses need msgpack
+    msgpack = None
+
+# -----------------------------
+# Field Projection
+# -----------------------------
+# `fields=student_id,student_name` selects only those columns in SQL, so
+# neither the ORM nor the encoder touches the others. student_id is always
+# selected because keyset pagination resumes from it; it is only returned
+# when asked for.
+
+STUDENT_FIELDS = ("student_id", "student_name", "enrollment_year", "department_id")
+
+
+def parse_fields(value: str = None):
+    """Parse a fields= parameter into a tuple of student fields; raises ValueError for unknown ones"""
+    if not value:
+        return STUDENT_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in STUDENT_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"'fields' must be a comma-separated subset of {', '.join(STUDENT_FIELDS)}")
+    return fields
+
+def student_columns(fields=STUDENT_FIELDS):
+    """Student columns to SELECT for `fields`, always including student_id"""
+    return [getattr(Student, field) for field in dict.fromkeys(("student_id",) + tuple(fields))]
+
+def student_select(fields=STUDENT_FIELDS):
+    """SELECT of the columns for `fields`; a Core select, so rows stay rows even for a single column"""
+    return select(*student_columns(fields))
+
+def project(row, fields=STUDENT_FIELDS):
+    """Dict of `fields` from a result row, Student or StudentRecord"""
+    return {field: getattr(row, field) for field in fields}
+
+
+# -----------------------------
+# Encoders
+# -----------------------------
+# FastJSONProvider replaces Flask's json provider, so every jsonify() is
+# encoded by orjson when it is installed; UNIVERSITY_JSON_ENCODER=json
+# switches back to the stdlib encoder. Responses can also be sent as
+# MessagePack when the client's Accept header prefers it and msgpack is
+# installed.
+
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app, encoder: str = None):
+        super().__init__(app)
+        encoder = encoder or os.environ.get("UNIVERSITY_JSON_ENCODER", "orjson")
+        self.use_orjson = encoder == "orjson" and orjson is not None
+
+    def _options(self):
+        return orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+
+    def dumps(self, obj, **kwargs):
+        if not self.use_orjson or kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        # Bytes straight from orjson: no str round-trip
+        body = orjson.dumps(
+            self._prepare_response_obj(args, kwargs),
+            default=self.default,
+            option=self._options() | orjson.OPT_APPEND_NEWLINE,
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def preferred_mimetype(accept_mimetypes):
+    """application/json, or a MessagePack type when the client prefers it and msgpack is installed"""
+    offered = ["application/json"] + (list(MSGPACK_MIMETYPES) if msgpack is not None else [])
+    return accept_mimetypes.best_match(offered, default="application/json")
+
+def encode_msgpack(payload):
+    return msgpack.packb(payload)
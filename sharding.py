@@ -0,0 +1,294 @@
+# sharding.py
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.horizontal_shard import ShardedSession, set_shard_id
+from sqlalchemy.orm import loading
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, UnaryExpression
+from sqlmodel import Session
+
+from database import RoutingSession, create_db_engine
+from migrations import migrate
+from university_db import University, Department, Student
+
+# -----------------------------
+# Sharded Storage (optional)
+# -----------------------------
+# With UNIVERSITY_SHARDS=N every university, its departments and their
+# students live in one of N SQLite files. A new university is placed by a
+# hash of its name; departments and students follow their university.
+#
+# Ids stay globally unique because each shard hands out ids from its own
+# range: shard k allocates from k * SHARD_ID_SPAN upwards, so shard_of(id)
+# needs no lookup and an existing unsharded university.db can serve as
+# shard 0 unchanged.
+#
+# sharded_session() returns a Session for the helpers in main.py and
+# university_analytics.py:
+# - Lookups by id, and queries filtered on a university, department or
+#   student id, go to the one shard that holds them.
+# - Inserts go to the shard of their parent row.
+# - Other reads fan out to all shards in parallel on a thread pool.
+# - Fan-out results are merged in ORDER BY order, and LIMIT/OFFSET apply to
+#   the merged rows, so keyset and offset pagination stay correct. An ORDER
+#   BY expression that is not selected, such as the bm25 rank of a ranked
+#   name search, is fetched from each shard as an extra column to merge on.
+#   bm25 scores use each shard's own term statistics, so a ranked merge is
+#   only as comparable as the shards are alike.
+# - Streamed reads (yield_per) are not merged: they come shard by shard,
+#   which is ORDER BY order only for reads ordered by id.
+#
+#   UNIVERSITY_SHARDS         number of shards (unset = unsharded)
+#   UNIVERSITY_SHARD_URL      URL template (default sqlite:///university_shard_{shard}.db)
+#   UNIVERSITY_SHARD_WORKERS  fan-out threads (default: one per shard)
+
+SHARD_ID_SPAN = 1 << 40
+DEFAULT_SHARD_URL = "sqlite:///university_shard_{shard}.db"
+
+SHARD_KEY_COLUMNS = {"university_id", "department_id", "student_id"}
+ID_COLUMNS = {University: "university_id", Department: "department_id", Student: "student_id"}
+
+
+def shard_of(record_id):
+    """Shard that allocated `record_id` (records without a parent live on shard 0)"""
+    return int(record_id) // SHARD_ID_SPAN if record_id else 0
+
+
+class ShardSet:
+    """One migrated engine per shard, keyed by shard id"""
+
+    def __init__(self, urls):
+        self.engines = {}
+        for shard_id, url in enumerate(urls):
+            engine = create_db_engine(url)
+            migrate(engine)
+            self.engines[shard_id] = engine
+            _engine_shards[engine] = shard_id
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("UNIVERSITY_SHARD_WORKERS", len(urls))),
+            thread_name_prefix="shard-fan-out",
+        )
+
+    def __len__(self):
+        return len(self.engines)
+
+    def shard_for_name(self, university_name: str):
+        return zlib.crc32(university_name.encode()) % len(self.engines)
+
+    def dispose(self):
+        self.executor.shutdown()
+        for engine in self.engines.values():
+            _engine_shards.pop(engine, None)
+            engine.dispose()
+
+
+_engine_shards = {}  # shard engine -> shard id, read by the id allocator
+_shard_set = None
+_shard_set_lock = threading.Lock()
+
+def get_shard_set():
+    """Return the ShardSet configured by UNIVERSITY_SHARDS, or None when storage is unsharded"""
+    global _shard_set
+    if _shard_set is None and os.environ.get("UNIVERSITY_SHARDS"):
+        with _shard_set_lock:
+            if _shard_set is None:
+                template = os.environ.get("UNIVERSITY_SHARD_URL", DEFAULT_SHARD_URL)
+                count = int(os.environ["UNIVERSITY_SHARDS"])
+                _shard_set = ShardSet([template.format(shard=shard_id) for shard_id in range(count)])
+    return _shard_set
+
+
+# -----------------------------
+# Routing
+# -----------------------------
+def choose_shard(shard_set: ShardSet, instance):
+    """Shard for a new row: universities by name hash, children by their parent's id"""
+    if isinstance(instance, University):
+        return shard_set.shard_for_name(instance.university_name)
+    if isinstance(instance, Department):
+        return shard_of(instance.university_id)
+    if isinstance(instance, Student):
+        return shard_of(instance.department_id)
+    return 0
+
+def identity_chooser(mapper, primary_key, *, lazy_loaded_from, execution_options, bind_arguments, **kw):
+    return [shard_of(primary_key[0])]
+
+def shard_key_values(whereclause, parameters=None):
+    """Ids compared with == or IN against a shard key column in the top-level AND of `whereclause`"""
+    if whereclause is None:
+        return None
+    if isinstance(whereclause, BooleanClauseList) and whereclause.operator is operators.and_:
+        conditions = whereclause.clauses
+    else:
+        conditions = [whereclause]
+
+    for condition in conditions:
+        if not isinstance(condition, BinaryExpression) or getattr(condition.left, "key", None) not in SHARD_KEY_COLUMNS:
+            continue
+        if not isinstance(condition.right, BindParameter):
+            continue
+        value = condition.right.effective_value
+        if isinstance(parameters, dict) and condition.right.key in parameters:
+            value = parameters[condition.right.key]
+        if condition.operator is operators.eq and value is not None:
+            return [value]
+        if condition.operator is operators.in_op and isinstance(value, (list, tuple)):
+            return list(value)
+    return None
+
+def execute_chooser(orm_context):
+    session = orm_context.session
+    ids = shard_key_values(getattr(orm_context.statement, "whereclause", None), orm_context.parameters)
+    if ids is not None:
+        return sorted({shard_of(record_id) for record_id in ids} & set(session.shard_set.engines))
+    return list(session.shard_set.engines)
+
+
+class UniversityShardedSession(ShardedSession, Session):
+    """ShardedSession with SQLModel's exec() that routes by university"""
+
+    def __init__(self, shard_set: ShardSet, **options):
+        self.shard_set = shard_set
+        super().__init__(
+            shard_chooser=lambda mapper, instance, clause=None: choose_shard(shard_set, instance),
+            identity_chooser=identity_chooser,
+            execute_chooser=execute_chooser,
+            shards=shard_set.engines,
+            **options,
+        )
+
+def open_session():
+    """A sharded session when UNIVERSITY_SHARDS is set, else the usual read/write routed session"""
+    if get_shard_set() is not None:
+        return sharded_session()
+    return RoutingSession()
+
+def sharded_session(shard_set: ShardSet = None):
+    """Open a session over `shard_set` (default: the configured one)"""
+    shard_set = shard_set or get_shard_set()
+    if shard_set is None:
+        raise RuntimeError("Sharding is not configured; set UNIVERSITY_SHARDS")
+    return UniversityShardedSession(shard_set)
+
+
+# -----------------------------
+# Id Allocation
+# -----------------------------
+# The id is computed inside the INSERT itself, so concurrent writers on one
+# shard can never hand out the same id.
+def allocate_shard_id(mapper, connection, instance):
+    shard_id = _engine_shards.get(connection.engine)
+    id_column = ID_COLUMNS[type(instance)]
+    if shard_id is None or getattr(instance, id_column) is not None:
+        return
+    column = getattr(type(instance), id_column)
+    setattr(instance, id_column, select(func.coalesce(func.max(column), shard_id * SHARD_ID_SPAN) + 1).scalar_subquery())
+
+def refuse_cross_shard_move(mapper, connection, instance):
+    shard_id = _engine_shards.get(connection.engine)
+    parent_id = instance.university_id if isinstance(instance, Department) else getattr(instance, "department_id", None)
+    if shard_id is not None and parent_id is not None and shard_of(parent_id) != shard_id:
+        raise ValueError(f"Cannot move {type(instance).__name__.lower()} {getattr(instance, ID_COLUMNS[type(instance)])} to another shard")
+
+for model in ID_COLUMNS:
+    event.listen(model, "before_insert", allocate_shard_id)
+event.listen(Department, "before_update", refuse_cross_shard_move)
+event.listen(Student, "before_update", refuse_cross_shard_move)
+
+
+# -----------------------------
+# Parallel Fan-out
+# -----------------------------
+def sort_columns(statement):
+    """`statement` plus any ORDER BY expression its result lacks (e.g. a bm25 rank), and per ORDER BY column (value getter for a result row, descending)"""
+    getters, extra = [], []
+    width = len(statement.column_descriptions)
+    for clause in getattr(statement, "_order_by_clauses", ()):
+        descending = isinstance(clause, UnaryExpression) and clause.modifier is operators.desc_op
+        column = clause.element if isinstance(clause, UnaryExpression) else clause
+        getter = None
+        for index, description in enumerate(statement.column_descriptions):
+            entity = description.get("entity")
+            expr = description.get("expr")
+            if entity is not None and expr is entity and column.key in entity.__table__.c:
+                getter = lambda row, index=index, key=column.key: getattr(row[index], key)
+                break
+            if description.get("name") == column.key:
+                getter = lambda row, index=index: row[index]
+                break
+        if getter is None:
+            # Each shard returns the sort value as an extra column, dropped after the merge
+            getter = lambda row, index=width + len(extra): row[index]
+            extra.append(column.label(f"shard_sort_key_{len(extra)}"))
+        getters.append((getter, descending))
+    return (statement.add_columns(*extra) if extra else statement), getters
+
+def merge_rows(statement, shard_rows, getters):
+    """Combine per-shard rows in ORDER BY order and apply the statement's LIMIT/OFFSET"""
+    rows = [row for rows in shard_rows for row in rows]
+    # Stable sorts from the last key to the first give a multi-key order;
+    # NULLs sort first, as in SQLite
+    for getter, descending in reversed(getters):
+        rows.sort(key=lambda row: (getter(row) is not None, getter(row)), reverse=descending)
+    offset = statement._offset or 0
+    if statement._limit is not None:
+        return rows[offset:offset + statement._limit]
+    return rows[offset:]
+
+def explicit_shard(orm_context):
+    for option in orm_context._non_compile_orm_options:
+        if isinstance(option, set_shard_id):
+            return option.shard_id
+    options = orm_context.load_options
+    if options._identity_token is not None:
+        return options._identity_token
+    if "_sa_shard_id" in orm_context.execution_options:
+        return orm_context.execution_options["_sa_shard_id"]
+    return orm_context.bind_arguments.get("shard_id")
+
+def run_on_shard(engine, shard_id, statement, parameters):
+    with Session(engine) as session:
+        return session.execute(statement, parameters, execution_options={"identity_token": shard_id}).freeze()
+
+@event.listens_for(UniversityShardedSession, "do_orm_execute", insert=True)
+def fan_out(orm_context):
+    """Run multi-shard SELECTs on the thread pool and merge them; anything else goes through ShardedSession"""
+    session = orm_context.session
+    if not orm_context.is_select or orm_context.load_options._refresh_state is not None or explicit_shard(orm_context) is not None:
+        return None
+    # Streaming reads stay lazy, and a transaction with unflushed or
+    # uncommitted writes must read through its own connections
+    if orm_context.execution_options.get("yield_per") or session.new or session.dirty or session.deleted or session.info.get("wrote"):
+        return None
+    shard_ids = execute_chooser(orm_context)
+    if len(shard_ids) < 2:
+        return None
+
+    statement = orm_context.statement
+    per_shard, getters = sort_columns(statement)
+    if statement._offset:
+        per_shard = per_shard.offset(None).limit(None if statement._limit is None else statement._offset + statement._limit)
+    futures = [
+        session.shard_set.executor.submit(run_on_shard, session.shard_set.engines[shard_id], shard_id, per_shard, orm_context.parameters)
+        for shard_id in shard_ids
+    ]
+    frozen = [future.result() for future in futures]
+    merged = frozen[0].with_new_rows(merge_rows(statement, [result._rewrite_rows() for result in frozen], getters))
+    width = len(statement.column_descriptions)
+    if len(per_shard.column_descriptions) > width:
+        merged = merged().columns(*range(width)).freeze()
+    return loading.merge_frozen_result(session, statement, merged, load=False)()
+
+@event.listens_for(UniversityShardedSession, "after_flush")
+def remember_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(UniversityShardedSession, "after_transaction_end")
+def forget_write(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
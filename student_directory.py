@@ -0,0 +1,238 @@
+# student_directory.py
+import argparse
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlmodel import Session
+
+import response_cache
+from database import RoutingSession, get_engine, get_read_engine
+
+# -----------------------------
+# In-Memory Student Directory
+# -----------------------------
+# A read model of every student held in parallel typed arrays sorted by
+# student id, with names interned and a per-department index of student
+# ids. It answers lookups by id (search by id in app.py) and by department,
+# optionally of one enrollment year (get_students_by_department in main.py
+# and university_analytics.py), with no database round-trip. Those return
+# StudentRecords, which carry the Student columns but no relationships.
+#
+# The model stays current by polling the student_change log (migration 6),
+# which the student triggers fill on every write from any process. A
+# refresh runs before a read when this process has committed a student
+# write since the last refresh (read-your-writes), or at most every poll
+# interval otherwise. It only fetches the rows changed since the last seq
+# it applied.
+#
+#   UNIVERSITY_STUDENT_DIRECTORY     set to 1 to serve these lookups from the model
+#   UNIVERSITY_DIRECTORY_POLL_MS     poll interval (default 1000)
+
+MISSING = -1  # stands in for NULL in the integer arrays
+DEFAULT_POLL_MS = 1000
+
+SNAPSHOT = text("SELECT student_id, student_name, enrollment_year, department_id FROM student ORDER BY student_id")
+LAST_CHANGE = text("SELECT IFNULL(MAX(seq), 0) FROM student_change")
+CHANGES = text("""
+    SELECT c.seq, c.student_id, s.student_id IS NOT NULL, s.student_name, s.enrollment_year, s.department_id
+    FROM student_change AS c LEFT JOIN student AS s ON s.student_id = c.student_id
+    WHERE c.seq > :after ORDER BY c.seq
+""")
+
+
+class StudentRecord(NamedTuple):
+    student_id: int
+    student_name: str
+    enrollment_year: Optional[int]
+    department_id: Optional[int]
+
+
+def enabled():
+    return os.environ.get("UNIVERSITY_STUDENT_DIRECTORY", "") not in ("", "0")
+
+
+class StudentDirectory:
+    def __init__(self, engine, poll_interval: float = None):
+        self.engine = engine
+        if poll_interval is None:
+            poll_interval = float(os.environ.get("UNIVERSITY_DIRECTORY_POLL_MS", DEFAULT_POLL_MS)) / 1000
+        self.poll_interval = poll_interval
+        self.ids = array("q")
+        self.years = array("q")
+        self.departments = array("q")
+        self.names = []
+        self.by_department = {}  # department id (MISSING for none) -> sorted student ids
+        self.last_seq = None     # None until the first load
+        self.refreshes = 0
+        self._seen_version = None
+        self._next_poll = 0.0
+        self._lock = threading.Lock()          # guards the arrays and indexes
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+
+    # Reads
+    def get(self, student_id: int):
+        """Return the StudentRecord for `student_id`, or None"""
+        self.refresh()
+        with self._lock:
+            position = self._position(student_id)
+            return None if position is None else self._record(position)
+
+    def in_department(self, department_id: Optional[int], year: Optional[int] = None):
+        """Students of a department (None = without one), optionally of one enrollment year"""
+        self.refresh()
+        with self._lock:
+            records = [self._record(self._position(student_id)) for student_id in self.by_department.get(_key(department_id), ())]
+        if year is not None:
+            records = [record for record in records if record.enrollment_year == year]
+        return records
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _position(self, student_id: int):
+        position = bisect_left(self.ids, student_id)
+        if position < len(self.ids) and self.ids[position] == student_id:
+            return position
+        return None
+
+    def _record(self, position: int):
+        year, department_id = self.years[position], self.departments[position]
+        return StudentRecord(
+            self.ids[position],
+            self.names[position],
+            None if year == MISSING else year,
+            None if department_id == MISSING else department_id,
+        )
+
+    # Refresh
+    def refresh(self, force: bool = False):
+        """Apply changes from the log when due; returns the number of changes applied"""
+        version = response_cache.version("student")
+        if not force and self.last_seq is not None and version == self._seen_version and time.monotonic() < self._next_poll:
+            return 0
+        with self._refresh_lock:
+            with Session(self.engine) as session:
+                if self.last_seq is None:
+                    applied = self._load(session)
+                else:
+                    applied = self._apply_changes(session)
+            self._seen_version = version
+            self._next_poll = time.monotonic() + self.poll_interval
+            self.refreshes += 1
+            return applied
+
+    def _load(self, session: Session):
+        # The log position is read before the rows: a write landing in between
+        # is applied again by the next refresh instead of being missed
+        last_seq = session.exec(LAST_CHANGE).scalar()
+        ids, years, departments, names = array("q"), array("q"), array("q"), []
+        by_department = {}
+        for student_id, name, year, department_id in session.exec(SNAPSHOT):
+            ids.append(student_id)
+            names.append(sys.intern(name))
+            years.append(_key(year))
+            departments.append(_key(department_id))
+            by_department.setdefault(_key(department_id), array("q")).append(student_id)
+        with self._lock:
+            self.ids, self.years, self.departments, self.names = ids, years, departments, names
+            self.by_department = by_department
+            self.last_seq = last_seq
+        return len(ids)
+
+    def _apply_changes(self, session: Session):
+        changes = session.exec(CHANGES, params={"after": self.last_seq}).all()
+        if not changes:
+            return 0
+        with self._lock:
+            for seq, student_id, exists, name, year, department_id in changes:
+                self._remove(student_id)
+                if exists:
+                    self._insert(student_id, name, year, department_id)
+                self.last_seq = seq
+        return len(changes)
+
+    def _remove(self, student_id: int):
+        position = self._position(student_id)
+        if position is None:
+            return
+        _discard(self.by_department, self.departments[position], student_id)
+        del self.ids[position], self.years[position], self.departments[position], self.names[position]
+
+    def _insert(self, student_id: int, name: str, year: Optional[int], department_id: Optional[int]):
+        position = bisect_left(self.ids, student_id)  # new ids land at the end, so this is an append
+        self.ids.insert(position, student_id)
+        self.names.insert(position, sys.intern(name))
+        self.years.insert(position, _key(year))
+        self.departments.insert(position, _key(department_id))
+        insort(self.by_department.setdefault(_key(department_id), array("q")), student_id)
+
+
+def _key(value):
+    return MISSING if value is None else value
+
+def _discard(index: dict, key: int, student_id: int):
+    ids = index.get(key)
+    if ids is None:
+        return
+    position = bisect_left(ids, student_id)
+    if position < len(ids) and ids[position] == student_id:
+        del ids[position]
+        if not ids:
+            del index[key]
+
+
+_directories = {}  # engine -> StudentDirectory
+_directory_lock = threading.Lock()
+
+def get_directory(engine=None):
+    """Return the process-wide StudentDirectory over `engine` (default: the read-only engine), creating it on first use"""
+    engine = engine or get_read_engine() or get_engine()
+    directory = _directories.get(engine)
+    if directory is None:
+        with _directory_lock:
+            directory = _directories.get(engine)
+            if directory is None:
+                directory = _directories[engine] = StudentDirectory(engine)
+    return directory
+
+def for_session(session: Session):
+    """The directory of the database `session` reads, or None when the directory is off or the session is sharded"""
+    if not enabled() or isinstance(session, ShardedSession):
+        return None
+    if isinstance(session, RoutingSession):
+        return get_directory(session.read_engine or session.write_engine)
+    return get_directory(session.get_bind())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the student directory and report its size next to ORM objects")
+    parser.parse_args()
+
+    import tracemalloc
+    from sqlmodel import select
+    from university_db import Student, init_db
+
+    engine = init_db()
+    tracemalloc.start()
+    directory = StudentDirectory(engine)
+    start = time.perf_counter()
+    directory.refresh()
+    load_time = time.perf_counter() - start
+    directory_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    with Session(engine) as session:
+        students = session.exec(select(Student)).all()
+        orm_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"[INFO] {len(directory)} students loaded in {load_time:.2f}s")
+    print(f"[INFO] directory {directory_bytes / 1e6:.1f} MB, ORM objects {orm_bytes / 1e6:.1f} MB ({len(students)} rows)")
@@ -0,0 +1,60 @@
+# tests/conftest.py
+import asyncio
+
+import pytest
+
+import database
+import lookup_cache
+import metrics
+from database import create_async_db_engine, create_db_engine, create_read_engine
+from lookup_cache import LookupCache
+from response_cache import ResponseCache
+from university_db import init_db
+from write_batcher import WriteBatcher
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A migrated database of the test's own"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'university.db'}")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Flask test client of app.py on a new database of its own, which its first request migrates"""
+    import app
+
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = create_db_engine(url)
+    read_engine = create_read_engine(url)
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(read_engine)
+    monkeypatch.setattr(database, "_read_engine", read_engine)
+    monkeypatch.setattr(database, "_read_engine_created", True)
+    monkeypatch.setattr(app, "engine", engine)
+    monkeypatch.setattr(app, "write_batcher", WriteBatcher(engine))
+    monkeypatch.setattr(app, "search_cache", ResponseCache())
+    monkeypatch.setattr(lookup_cache, "university_ids", LookupCache())
+    monkeypatch.setattr(lookup_cache, "department_ids", LookupCache())
+    monkeypatch.setattr(app, "startup_done", False)
+    yield app.app.test_client()
+    engine.dispose()
+    read_engine.dispose()
+
+@pytest.fixture
+def asgi_client(engine, monkeypatch):
+    """Quart test client of asgi_app.py, served from the test's own database"""
+    import asgi_app
+
+    url = engine.url.render_as_string(hide_password=False)
+    async_engine = create_async_db_engine(url)
+    async_read_engine = create_read_engine(url, asynchronous=True)
+    monkeypatch.setattr(asgi_app, "async_engine", async_engine)
+    monkeypatch.setattr(asgi_app, "async_read_engine", async_read_engine)
+    monkeypatch.setattr(lookup_cache, "university_ids", LookupCache())
+    monkeypatch.setattr(lookup_cache, "department_ids", LookupCache())
+    yield asgi_app.app.test_client()
+    asyncio.run(async_engine.dispose())
+    asyncio.run(async_read_engine.dispose())
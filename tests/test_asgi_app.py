@@ -0,0 +1,21 @@
+# tests/test_asgi_app.py
+import asyncio
+
+
+def test_update_onto_an_existing_student_is_a_conflict(asgi_client):
+    async def scenario():
+        for name in ("Asgi One", "Asgi Two"):
+            response = await asgi_client.post("/students/full_add", json={
+                "name": name, "year": 2024, "department": "Physics", "university": "Asgi University",
+            })
+            assert response.status_code == 200
+        response = await asgi_client.put("/students/update", json={"name": "Asgi Two", "new_name": "Asgi One"})
+        return response.status_code, await response.get_json()
+
+    status, body = asyncio.run(scenario())
+
+    assert status == 409
+    assert body == {
+        "status": "failed",
+        "message": "A student with this name already exists in the target department and year; nothing was changed.",
+    }
@@ -0,0 +1,19 @@
+# tests/test_dedupe.py
+from dedupe import DuplicatePair, block_duplicates, exact_duplicates
+
+
+def test_exact_duplicate_of_a_near_duplicate_is_paired_exactly():
+    block = [(1, "rani sharmaa"), (2, "rani sharma"), (3, "rani sharma")]
+
+    pairs = list(block_duplicates(block, threshold=0.9))
+
+    assert pairs[0].student_id == 1 and pairs[0].duplicate_id == 2 and pairs[0].score < 1.0
+    assert pairs[1] == DuplicatePair(2, "rani sharma", 3, "rani sharma", 1.0)
+    assert exact_duplicates(pairs) == [pairs[1]]
+
+def test_large_block_matches_exact_keys_only():
+    block = [(1, "rani sharmaa"), (2, "rani sharma"), (3, "rani sharma")]
+
+    pairs = list(block_duplicates(block, threshold=0.9, max_block=2))
+
+    assert pairs == [DuplicatePair(2, "rani sharma", 3, "rani sharma", 1.0)]
@@ -0,0 +1,43 @@
+# tests/test_metrics.py
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    """Empty metric aggregates for the test"""
+    for name in ("request_latency", "request_statements", "requests_total", "db_statements_total", "db_time_total",
+                 "db_rows_total", "db_sessions_total", "db_commits_total", "slow_queries_total"):
+        monkeypatch.setattr(metrics, name, {})
+    return metrics
+
+def add_student(client, name):
+    response = client.post("/students/full_add", json={
+        "name": name, "year": 2024, "department": "Physics", "university": "Metrics University",
+    })
+    assert response.status_code == 200
+
+
+def test_startup_is_not_charged_to_the_first_request(counters, client):
+    add_student(client, "Metrics Student")
+
+    assert counters.db_statements_total[metrics.BACKGROUND_ROUTE] > 50  # every migration statement
+    assert counters.db_statements_total["/students/full_add"] < 10
+
+def test_rows_returned_per_route(counters, client):
+    for name in ("Metrics One", "Metrics Two", "Metrics Three"):
+        add_student(client, name)
+
+    assert client.get("/students").status_code == 200
+    assert client.get("/students/search?name=Metrics T").status_code == 200
+    with client.get("/students?format=ndjson") as streamed:  # counted when the server closes the body
+        assert streamed.get_data().count(b"\n") == 3
+    assert client.put("/students/update", json={"name": "Metrics One", "new_year": 2025}).status_code == 200
+    assert client.delete("/students/delete", json={"name": "Metrics Two"}).status_code == 200
+
+    assert counters.db_rows_total["/students"] == 6
+    assert counters.db_rows_total["/students/search"] == 2
+    assert counters.db_rows_total["/students/update"] == 1
+    assert counters.db_rows_total["/students/delete"] == 1
+    assert 'db_rows_returned_total{route="/students"} 6' in client.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,31 @@
+# tests/test_pagination.py
+import pytest
+from sqlmodel import select
+
+from pagination import encode_cursor, keyset_page
+from search import search_page
+from university_db import Student
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor({"after": []}), encode_cursor({"after": "x"}), encode_cursor([1]), "not a cursor"])
+def test_tampered_keyset_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        keyset_page(select(Student), Student.student_id, cursor=cursor)
+
+@pytest.mark.parametrize("cursor", [encode_cursor({"offset": []}), encode_cursor({"offset": {}}), encode_cursor({"offset": "x"})])
+def test_tampered_ranked_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        search_page("Student", mode="ranked", cursor=cursor)
+
+@pytest.mark.parametrize("query", [
+    {"cursor": encode_cursor({"after": []})},
+    {"cursor": encode_cursor({"after": []}), "name": "Student"},
+    {"cursor": encode_cursor({"offset": []}), "name": "Student", "mode": "ranked"},
+])
+def test_tampered_cursor_is_a_bad_request(client, query):
+    path = "/students/search" if "name" in query else "/students"
+
+    response = client.get(path, query_string=query)
+
+    assert response.status_code == 400
+    assert response.json == {"status": "failed", "message": "Invalid cursor"}
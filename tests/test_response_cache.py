@@ -0,0 +1,60 @@
+# tests/test_response_cache.py
+import time
+import types
+from email.utils import formatdate
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+NOW = 1_700_000_000.25
+
+
+def test_changed_body_within_the_same_second_is_modified():
+    cache = ResponseCache(maxsize=8, ttl=60)
+    first = cache.put("key", (1,), b"before", NOW)
+    since = int(first.last_modified)
+
+    second = cache.put("key", (2,), b"after", NOW + 0.5)
+
+    assert second.etag != first.etag
+    assert int(second.last_modified) > since
+    assert not cache.is_not_modified(second, None, since)
+
+def test_unchanged_body_keeps_its_validators():
+    cache = ResponseCache(maxsize=8, ttl=60)
+    first = cache.put("key", (1,), b"same", NOW)
+
+    second = cache.put("key", (2,), b"same", NOW + 5)
+
+    assert (second.etag, second.last_modified) == (first.etag, first.last_modified)
+    assert cache.is_not_modified(second, None, int(first.last_modified))
+
+
+@pytest.fixture
+def same_second(monkeypatch):
+    """Every write and response lands in the same wall-clock second"""
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=lambda: NOW, monotonic=time.monotonic))
+    monkeypatch.setattr(response_cache, "_started", NOW)
+    monkeypatch.setattr(response_cache, "_modified", {})
+
+def add_student(client, name):
+    response = client.post("/students/full_add", json={
+        "name": name, "year": 2024, "department": "Physics", "university": "Cache University",
+    })
+    assert response.status_code == 200
+
+def test_write_then_if_modified_since_in_the_same_second(same_second, client):
+    add_student(client, "Cache Student One")
+    first = client.get("/students/search?name=Cache Student")
+    assert first.status_code == 200
+    assert first.headers["Last-Modified"] == formatdate(int(NOW), usegmt=True)
+
+    add_student(client, "Cache Student Two")
+    second = client.get("/students/search?name=Cache Student", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+
+    assert second.status_code == 200
+    assert len(second.json["results"]) == 2
+    third = client.get("/students/search?name=Cache Student", headers={"If-Modified-Since": second.headers["Last-Modified"]})
+    assert third.status_code == 304
@@ -0,0 +1,89 @@
+# tests/test_sharding.py
+import itertools
+
+import pytest
+from sqlmodel import select
+
+from search import search_students
+from serialization import student_columns
+from sharding import SHARD_ID_SPAN, ShardSet, shard_of, sharded_session
+from university_db import Department, Student, University
+
+
+@pytest.fixture
+def shard_set(tmp_path):
+    shard_set = ShardSet([f"sqlite:///{tmp_path / f'shard_{shard_id}.db'}" for shard_id in range(2)])
+    yield shard_set
+    shard_set.dispose()
+
+def university_on(shard_set, shard_id):
+    """A university name that hashes to `shard_id`"""
+    return next(name for name in (f"University {i}" for i in itertools.count()) if shard_set.shard_for_name(name) == shard_id)
+
+def add_department(shard_set, shard_id, *student_names):
+    """A department on `shard_id` with the given students; returns the department id"""
+    with sharded_session(shard_set) as session:
+        university = University(university_name=university_on(shard_set, shard_id), location="Tirupati")
+        session.add(university)
+        session.flush()
+        department = Department(department_name="Physics", university_id=university.university_id)
+        session.add(department)
+        session.flush()
+        session.add_all([Student(student_name=name, enrollment_year=2024, department_id=department.department_id) for name in student_names])
+        session.commit()
+        return department.department_id
+
+
+def test_rows_follow_their_university_and_take_ids_from_its_range(shard_set):
+    department_id = add_department(shard_set, 1, "Ada Lovelace")
+
+    assert shard_of(department_id) == 1
+    with shard_set.engines[1].connect() as conn:
+        student_id, university_id = conn.exec_driver_sql(
+            "SELECT student_id, university_id FROM student JOIN department USING (department_id)"
+        ).one()
+    assert (university_id, student_id) == (SHARD_ID_SPAN + 1, SHARD_ID_SPAN + 1)
+    with shard_set.engines[0].connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM student").scalar() == 0
+
+def test_fan_out_merges_in_order_before_limit_and_offset(shard_set):
+    add_department(shard_set, 0, "Carol", "Alice", "Eve")
+    add_department(shard_set, 1, "Dave", "Bob")
+
+    with sharded_session(shard_set) as session:
+        page = session.exec(select(Student).order_by(Student.student_name).offset(1).limit(3)).all()
+        everyone = session.exec(select(Student.student_name).order_by(Student.student_name.desc())).all()
+
+    assert [student.student_name for student in page] == ["Bob", "Carol", "Dave"]
+    assert everyone == ["Eve", "Dave", "Carol", "Bob", "Alice"]
+
+def test_student_cannot_move_to_another_shard(shard_set):
+    here = add_department(shard_set, 0, "Ada Lovelace")
+    there = add_department(shard_set, 1)
+
+    with sharded_session(shard_set) as session:
+        student = session.exec(select(Student).where(Student.department_id == here)).one()
+        student.department_id = there
+        with pytest.raises(ValueError, match="another shard"):
+            session.commit()
+
+def test_ranked_search_merges_shards_by_rank(shard_set):
+    # Shorter names rank higher; shard 0, read first, holds the longer ones
+    add_department(shard_set, 0, "Kumar Anil Reddy Venkata Rao", "Kumar Suresh Babu Naidu", "Kumar Ravi Teja")
+    add_department(shard_set, 1, "Kumar", "Kumar Ravi")
+    ranks = []
+    for engine in shard_set.engines.values():
+        with engine.connect() as conn:
+            ranks += conn.exec_driver_sql("SELECT rank, rowid FROM student_name_fts WHERE student_name_fts MATCH '\"kumar\"'").all()
+    expected = [student_id for _, student_id in sorted(ranks)]
+
+    with sharded_session(shard_set) as session:
+        students, _ = search_students(session, "Kumar", mode="ranked", limit=10)
+        rows, _ = search_students(session, "Kumar", mode="ranked", limit=10, columns=student_columns(("student_name",)))
+        first, cursor = search_students(session, "Kumar", mode="ranked", limit=2)
+        second, _ = search_students(session, "Kumar", mode="ranked", limit=2, cursor=cursor)
+
+    assert [student.student_id for student in students] == expected
+    assert students[0].student_name == "Kumar" and shard_of(expected[0]) == 1  # not shard 0's rows first
+    assert [tuple(row) for row in rows] == [(student.student_id, student.student_name) for student in students]
+    assert [student.student_id for student in first + second] == expected[:4]
@@ -0,0 +1,84 @@
+# tests/test_student_directory.py
+import pytest
+from sqlmodel import Session
+
+import main
+import student_directory
+import university_analytics
+from database import RoutingSession
+from student_directory import StudentDirectory, StudentRecord
+from university_db import Department, Student, University
+
+
+@pytest.fixture
+def departments(engine):
+    """Ids of two departments of one university"""
+    with Session(engine) as session:
+        university = University(university_name="Directory University", location="Tirupati")
+        session.add(university)
+        session.flush()
+        physics = Department(department_name="Physics", university_id=university.university_id)
+        chemistry = Department(department_name="Chemistry", university_id=university.university_id)
+        session.add_all([physics, chemistry])
+        session.commit()
+        return physics.department_id, chemistry.department_id
+
+def add_students(engine, *students):
+    with Session(engine) as session:
+        rows = [Student(student_name=name, enrollment_year=year, department_id=department_id) for name, year, department_id in students]
+        session.add_all(rows)
+        session.commit()
+        return [row.student_id for row in rows]
+
+def execute(engine, sql, **params):
+    """A write the directory only learns about from the change log, as from another process"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(sql, params)
+
+
+def test_refresh_applies_inserts_updates_and_deletes(engine, departments):
+    physics, chemistry = departments
+    first, second = add_students(engine, ("Ada", 2024, physics), ("Grace", 2023, physics))
+    directory = StudentDirectory(engine, poll_interval=0)
+
+    assert directory.get(first) == StudentRecord(first, "Ada", 2024, physics)
+    assert [record.student_id for record in directory.in_department(physics)] == [first, second]
+
+    [third] = add_students(engine, ("Alan", 2024, chemistry))
+    execute(engine, "UPDATE student SET department_id = :chemistry, enrollment_year = 2025 WHERE student_id = :id", chemistry=chemistry, id=first)
+    execute(engine, "DELETE FROM student WHERE student_id = :id", id=second)
+
+    assert directory.get(second) is None
+    assert directory.get(first) == StudentRecord(first, "Ada", 2025, chemistry)
+    assert directory.in_department(physics) == []
+    assert physics not in directory.by_department  # emptied index entries are dropped
+    assert [record.student_id for record in directory.in_department(chemistry)] == [first, third]
+    assert directory.in_department(chemistry, 2025) == [StudentRecord(first, "Ada", 2025, chemistry)]
+    assert list(directory.ids) == [first, third]
+
+def test_reinserted_id_keeps_the_arrays_sorted(engine, departments):
+    physics, chemistry = departments
+    ids = add_students(engine, ("One", 2024, physics), ("Two", 2024, physics), ("Three", 2024, chemistry))
+    directory = StudentDirectory(engine, poll_interval=0)
+
+    execute(engine, "DELETE FROM student WHERE student_id = :id", id=ids[1])
+    directory.refresh()
+    execute(engine, "INSERT INTO student (student_id, student_name, enrollment_year, department_id) VALUES (:id, 'Two Again', 2024, :physics)",
+            id=ids[1], physics=physics)
+
+    assert directory.get(ids[1]) == StudentRecord(ids[1], "Two Again", 2024, physics)
+    assert list(directory.ids) == ids
+    assert list(directory.by_department[physics]) == ids[:2]
+
+@pytest.mark.parametrize("module", [main, university_analytics])
+def test_students_by_department_come_from_the_directory_when_enabled(engine, departments, monkeypatch, module):
+    physics, _ = departments
+    ids = add_students(engine, ("Ada", 2024, physics), ("Grace", 2023, physics))
+    monkeypatch.setenv("UNIVERSITY_STUDENT_DIRECTORY", "1")
+    monkeypatch.setattr(student_directory, "_directories", {})
+
+    with RoutingSession(engine, read_engine=engine) as session:
+        students = module.get_students_by_department(session, physics)
+
+    assert students == [StudentRecord(ids[0], "Ada", 2024, physics), StudentRecord(ids[1], "Grace", 2023, physics)]
+    assert list(student_directory._directories) == [engine]
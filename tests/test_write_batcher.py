@@ -0,0 +1,100 @@
+# tests/test_write_batcher.py
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlmodel import Session, select
+
+from university_db import Student
+
+from upserts import student_insert_if_new
+from write_batcher import WriteBatcher, WriteRejected
+
+
+def add_student(name):
+    return lambda session: session.exec(student_insert_if_new(name, 2024, None)).scalar_one()
+
+@contextmanager
+def write_lock_held(engine, seconds: float):
+    """Another connection takes the write lock and holds it for `seconds`"""
+    locked = threading.Event()
+
+    def hold():
+        conn = sqlite3.connect(engine.url.database, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        conn.execute("COMMIT")
+        conn.close()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    locked.wait()
+    try:
+        yield
+    finally:
+        holder.join()
+
+
+def student_names(engine):
+    with Session(engine) as session:
+        return set(session.exec(select(Student.student_name)))
+
+
+def test_failing_job_rolls_back_only_its_savepoint(engine):
+    batcher = WriteBatcher(engine, window=0.2, batch_size=3)
+
+    def add_then_fail(session):
+        add_student("Rolled Back")(session)
+        raise ValueError("job failed")
+
+    futures = [batcher.submit(add_student("First")), batcher.submit(add_then_fail), batcher.submit(add_student("Third"))]
+
+    assert futures[0].result() is not None and futures[2].result() is not None
+    with pytest.raises(ValueError, match="job failed"):
+        futures[1].result()
+    assert student_names(engine) == {"First", "Third"}
+    stats = batcher.stats()
+    assert (stats["batches"], stats["writes"], stats["largest_batch"]) == (1, 3, 3)
+
+def test_job_past_its_queue_deadline_is_rejected(engine):
+    batcher = WriteBatcher(engine, batch_size=1, deadline=0.1)
+
+    def slow(session):
+        time.sleep(0.3)
+        return add_student("Slow")(session)
+
+    slow_future = batcher.submit(slow)
+    waiting = batcher.submit(add_student("Waiting"))
+
+    assert slow_future.result() is not None
+    with pytest.raises(WriteRejected) as rejected:
+        waiting.result()
+    assert rejected.value.reason == "deadline"
+    assert student_names(engine) == {"Slow"}
+    assert batcher.stats()["rejected"]["deadline"] == 1
+
+def test_busy_transaction_is_retried_within_the_deadline(engine):
+    batcher = WriteBatcher(engine, deadline=2.0, busy_retries=3)  # 0.5s per attempt
+
+    with write_lock_held(engine, 0.8):
+        student_id = batcher.run(add_student("Busy Student"))
+
+    assert batcher.stats()["busy_retries"] >= 1
+    with Session(engine) as session:
+        assert session.get(Student, student_id).student_name == "Busy Student"
+
+def test_busy_transaction_is_rejected_by_its_deadline(engine):
+    batcher = WriteBatcher(engine, deadline=0.4, busy_retries=3)
+
+    with write_lock_held(engine, 3.0):
+        start = time.monotonic()
+        with pytest.raises(WriteRejected) as rejected:
+            batcher.run(add_student("Busy Student"))
+        elapsed = time.monotonic() - start
+
+    assert rejected.value.reason == "busy"
+    assert elapsed < 1.0  # not the engine's 5s busy_timeout
+    assert batcher.stats()["rejected"]["busy"] == 1
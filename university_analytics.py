@@ -1,7 +1,12 @@
 # crud_functions.py
-from sqlmodel import Session, select
+from sqlalchemy import inspect
+from sqlmodel import Session, select, delete
+from sharding import open_session
 from university_db import University, Department, Student
-from university_db import engine
+from university_db import init_db, student_details_select, student_objects_select
+import lookup_cache
+import student_directory
+from pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, paginate, stream
 
 # -----------------------------
 # Student Functions
@@ -10,6 +15,14 @@ def get_all_students(session: Session):
     """Get all students"""
     return session.exec(select(Student)).all()
 
+def get_students_page(session: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Get one keyset page of students as (students, next_cursor)"""
+    return paginate(session, select(Student), Student.student_id, limit, cursor)
+
+def iter_students(session: Session, batch_size: int = STREAM_BATCH_SIZE):
+    """Stream all students from a server-side cursor"""
+    return stream(session, select(Student).order_by(Student.student_id), batch_size)
+
 def get_student_by_id(session: Session, student_id: int):
     """Get student by ID"""
     return session.get(Student, student_id)
@@ -63,6 +76,7 @@ def create_department(session: Session, name: str, uni_id: int = None):
     session.add(department)
     session.commit()
     session.refresh(department)
+    lookup_cache.remember_department(department)
     return department
 
 def update_department(session: Session, department_id: int, name: str = None, uni_id: int = None):
@@ -76,16 +90,21 @@ def update_department(session: Session, department_id: int, name: str = None, un
         session.add(department)
         session.commit()
         session.refresh(department)
+        lookup_cache.remember_department(department)
     return department
 
 def delete_department(session: Session, department_id: int):
-    """Delete department"""
-    department = session.get(Department, department_id)
-    if department:
-        session.delete(department)
-        session.commit()
-        return True
-    return False
+    """Delete a department and its students; returns the deleted row counts, or False if it does not exist"""
+    if session.exec(select(Department.department_id).where(Department.department_id == department_id)).first() is None:
+        return False
+    counts = {
+        "students": delete_rows(session, delete(Student).where(Student.department_id == department_id)),
+        "departments": delete_rows(session, delete(Department).where(Department.department_id == department_id)),
+    }
+    expunge_deleted(session, {department_id})
+    session.commit()
+    lookup_cache.forget_department(department_id)
+    return counts
 
 # -----------------------------
 # University Functions
@@ -104,6 +123,7 @@ def create_university(session: Session, name: str, location: str = None):
     session.add(university)
     session.commit()
     session.refresh(university)
+    lookup_cache.remember_university(university)
     return university
 
 def update_university(session: Session, university_id: int, name: str = None, location: str = None):
@@ -117,36 +137,82 @@ def update_university(session: Session, university_id: int, name: str = None, lo
         session.add(university)
         session.commit()
         session.refresh(university)
+        lookup_cache.remember_university(university)
     return university
 
 def delete_university(session: Session, university_id: int):
-    """Delete university"""
-    university = session.get(University, university_id)
-    if university:
-        session.delete(university)
-        session.commit()
-        return True
-    return False
+    """Delete a university with its departments and their students; returns the deleted row counts, or False if it does not exist"""
+    if session.exec(select(University.university_id).where(University.university_id == university_id)).first() is None:
+        return False
+    department_ids = select(Department.department_id).where(Department.university_id == university_id)
+    deleted_departments = set(session.exec(department_ids))
+    counts = {
+        "students": delete_rows(session, delete(Student).where(Student.department_id.in_(department_ids))),
+        "departments": delete_rows(session, delete(Department).where(Department.university_id == university_id)),
+        "universities": delete_rows(session, delete(University).where(University.university_id == university_id)),
+    }
+    expunge_deleted(session, deleted_departments, university_id)
+    session.commit()
+    lookup_cache.forget_university(university_id)
+    return counts
+
+# -----------------------------
+# Cascading Deletes
+# -----------------------------
+# Children are deleted before their parents with one DELETE ... WHERE per
+# table, so the enforced foreign keys hold at every step and no child row is
+# loaded into Python. The student triggers keep the search index and the
+# enrollment summary in step.
+def delete_rows(session: Session, statement):
+    return session.exec(statement.execution_options(synchronize_session=False)).rowcount
+
+def expunge_deleted(session: Session, department_ids: set, university_id: int = None):
+    """Drop objects for the deleted rows from the session's identity map"""
+    for obj in list(session.identity_map.values()):
+        state = inspect(obj)
+        if isinstance(obj, Student):
+            deleted = state.dict.get("department_id") in department_ids
+        elif isinstance(obj, Department):
+            deleted = state.identity[0] in department_ids
+        else:
+            deleted = isinstance(obj, University) and state.identity[0] == university_id
+        if deleted:
+            session.expunge(obj)
 
 # -----------------------------
 # Query Functions
 # -----------------------------
-def get_students_with_details(session: Session):
-    """Get students with department and university details"""
-    statement = select(Student).join(Department).join(University)
+def get_students_with_details(session: Session, eager: str = None):
+    """Get flat student/department/university rows, or Student objects with relations loaded when `eager` is set"""
+    statement = student_objects_select(eager) if eager else student_details_select()
     return session.exec(statement).all()
 
+def get_students_with_details_page(session: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """Get one keyset page of flat student detail rows"""
+    return paginate(session, student_details_select(), Student.student_id, limit, cursor)
+
+def iter_students_with_details(session: Session, batch_size: int = STREAM_BATCH_SIZE):
+    """Stream flat student detail rows from a server-side cursor"""
+    return stream(session, student_details_select().order_by(Student.student_id), batch_size)
+
 def get_departments_by_university(session: Session, university_id: int):
     """Get all departments of a specific university"""
     statement = select(Department).where(Department.university_id == university_id)
     return session.exec(statement).all()
 
 def get_students_by_department(session: Session, department_id: int):
-    """Get all students in a specific department"""
+    """Get all students in a specific department (StudentRecords from the student directory when it is enabled)"""
+    directory = student_directory.for_session(session)
+    if directory is not None:
+        return directory.in_department(department_id)
     statement = select(Student).where(Student.department_id == department_id)
     return session.exec(statement).all()
-# all_students=get_all_students(session=Session(engine))
-# print(f"All Students: {all_students}")
 
-department= get_students_by_department(session=Session(engine), department_id=1)
-print(f"Students in Department 1:{department}")
+
+if __name__ == "__main__":
+    init_db()
+    # all_students=get_all_students(session=Session(engine))
+    # print(f"All Students: {all_students}")
+    with open_session() as session:
+        department= get_students_by_department(session=session, department_id=1)
+        print(f"Students in Department 1:{department}")
@@ -1,11 +1,23 @@
 # university_db.py
+import threading
 from typing import Optional, List
-from sqlmodel import SQLModel, Field, Relationship, create_engine, Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import SQLModel, Field, Relationship, Session, Index, select
+from database import get_engine
+from dedupe import name_columns, normalize_name, phonetic_key
+from migrations import migrate
 
 # -----------------------------
 # Universities Table
 # -----------------------------
 class University(SQLModel, table=True):
+    # Unique indexes double as the natural-key constraints used by ON CONFLICT upserts.
+    # Keep these in step with migrations.py, which applies them to existing databases.
+    __table_args__ = (
+        Index("uq_university_name", "university_name", unique=True),
+    )
+
     university_id: Optional[int] = Field(default=None, primary_key=True)
     university_name: str
     location: Optional[str] = None
@@ -17,6 +29,11 @@ class University(SQLModel, table=True):
 # Departments Table
 # -----------------------------
 class Department(SQLModel, table=True):
+    __table_args__ = (
+        Index("uq_department_name_university", "department_name", "university_id", unique=True),
+        Index("ix_department_university_name", "university_id", "department_name"),
+    )
+
     department_id: Optional[int] = Field(default=None, primary_key=True)
     department_name: str
     university_id: Optional[int] = Field(default=None, foreign_key="university.university_id")
@@ -29,24 +46,104 @@ class Department(SQLModel, table=True):
 # Students Table
 # -----------------------------
 class Student(SQLModel, table=True):
+    __table_args__ = (
+        Index("uq_student_name_year_department", "student_name", "enrollment_year", "department_id", unique=True),
+        Index("ix_student_department_year_name", "department_id", "enrollment_year", "student_name", "name_key", "name_phonetic"),
+        Index("ix_student_name_key_year_department", "name_key", "enrollment_year", "department_id"),
+        Index("ix_student_phonetic_year_department", "name_phonetic", "enrollment_year", "department_id", "name_key"),
+    )
+
     student_id: Optional[int] = Field(default=None, primary_key=True)
     student_name: str
     enrollment_year: Optional[int] = None
     department_id: Optional[int] = Field(default=None, foreign_key="department.department_id")
 
+    # Derived from student_name for duplicate detection (dedupe.py) and left
+    # out of API responses. Core INSERTs get them from these column defaults
+    name_key: Optional[str] = Field(default=None, exclude=True, sa_column_kwargs={
+        "default": lambda context: normalize_name(context.get_current_parameters()["student_name"]),
+    })
+    name_phonetic: Optional[str] = Field(default=None, exclude=True, sa_column_kwargs={
+        "default": lambda context: phonetic_key(context.get_current_parameters()["student_name"]),
+    })
+
     department: Optional[Department] = Relationship(back_populates="students")
 
 
+# ORM writes set the name keys explicitly: a new object already carries
+# None for them, and an UPDATE only needs them when the name changed. Core
+# UPDATEs of student_name add dedupe.name_columns() to their values.
+@event.listens_for(Student, "before_insert")
+def set_name_keys(mapper, connection, student: Student):
+    for column, value in name_columns(student.student_name).items():
+        setattr(student, column, value)
+
+@event.listens_for(Student, "before_update")
+def update_name_keys(mapper, connection, student: Student):
+    if inspect(student).attrs.student_name.history.has_changes():
+        set_name_keys(mapper, connection, student)
+
+
 # -----------------------------
-# Create SQLite Database
+# Student Details Queries
 # -----------------------------
-sqlite_file_name = "D:/university_db_project/university.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+EAGER_LOADERS = {"selectin": selectinload, "joined": joinedload}
+
+def student_details_select():
+    """Flat (student_id, student_name, enrollment_year, department_name, university_name, location) rows.
+
+    Plain column rows skip ORM hydration and the identity map, and nothing is
+    left to lazy-load afterwards.
+    """
+    return (
+        select(
+            Student.student_id,
+            Student.student_name,
+            Student.enrollment_year,
+            Department.department_name,
+            University.university_name,
+            University.location,
+        )
+        .join(Department, Student.department_id == Department.department_id)
+        .join(University, Department.university_id == University.university_id)
+    )
+
+def student_objects_select(eager: str = "selectin"):
+    """Student objects with .department.university loaded up front ("selectin" or "joined")"""
+    if eager not in EAGER_LOADERS:
+        raise ValueError(f"eager must be one of {', '.join(EAGER_LOADERS)}")
+    loader = EAGER_LOADERS[eager]
+    return (
+        select(Student)
+        .join(Department)
+        .join(University)
+        .options(loader(Student.department).options(loader(Department.university)))
+    )
 
-engine = create_engine(sqlite_url, echo=True)
 
-# Create tables
-SQLModel.metadata.create_all(engine)
+# -----------------------------
+# Engine and Schema Setup
+# -----------------------------
+# Importing this module does no I/O. `engine` is created on first access
+# (database.get_engine), and entry points call init_db() once at startup to
+# create or upgrade the tables through the versioned migrations.
+_initialized = set()
+_init_lock = threading.Lock()
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def init_db(engine=None):
+    """Bring the schema up to date once per process and return the engine"""
+    engine = engine or get_engine()
+    if engine not in _initialized:
+        with _init_lock:
+            if engine not in _initialized:
+                migrate(engine)
+                _initialized.add(engine)
+    return engine
 
 
 # -----------------------------
@@ -0,0 +1,46 @@
+# upserts.py
+from sqlalchemy import exists, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from dedupe import name_columns
+from university_db import University, Department, Student
+
+# -----------------------------
+# Natural-Key Upsert Statements
+# -----------------------------
+# Shared by the Flask app and the ASGI app. Each statement resolves its row
+# in a single round-trip and relies on the unique indexes from migration 2.
+# New students are also checked against the normalized name key (migration
+# 7), so "Rani", "rani " and "RANI" are one student.
+
+def university_upsert(name: str, location: str):
+    """INSERT the university unless it exists, RETURNING its id either way"""
+    statement = sqlite_insert(University).values(university_name=name, location=location)
+    return statement.on_conflict_do_update(
+        index_elements=["university_name"],
+        set_={"university_name": statement.excluded.university_name},
+    ).returning(University.university_id)
+
+def department_upsert(dept_name: str, uni_id: int):
+    """INSERT the department unless it exists, RETURNING its id either way"""
+    statement = sqlite_insert(Department).values(department_name=dept_name, university_id=uni_id)
+    return statement.on_conflict_do_update(
+        index_elements=["department_name", "university_id"],
+        set_={"department_name": statement.excluded.department_name},
+    ).returning(Department.department_id)
+
+def student_insert_if_new(name: str, year: int, dept_id: int):
+    """INSERT the student, RETURNING its id, or no row when it (or a name differing only in case, accents or spacing) exists"""
+    keys = name_columns(name)
+    duplicate = exists().where(
+        Student.name_key == keys["name_key"],
+        Student.enrollment_year == year,
+        Student.department_id == dept_id,
+    )
+    row = select(
+        literal(name), literal(year), literal(dept_id), literal(keys["name_key"]), literal(keys["name_phonetic"])
+    ).where(~duplicate)
+    return sqlite_insert(Student).from_select(
+        ["student_name", "enrollment_year", "department_id", "name_key", "name_phonetic"], row
+    ).on_conflict_do_nothing(
+        index_elements=["student_name", "enrollment_year", "department_id"]
+    ).returning(Student.student_id)
@@ -0,0 +1,249 @@
+# write_batcher.py
+import contextvars
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+# -----------------------------
+# Group Commit
+# -----------------------------
+# SQLite has a single writer lock, so many small transactions from request
+# threads queue on it and each pays its own commit. A WriteBatcher hands
+# every write job to one writer thread, which gathers the jobs that arrive
+# within `window` seconds (at most `batch_size`) and runs them in a single
+# BEGIN IMMEDIATE transaction. Each job gets its own SAVEPOINT, so a job
+# that raises is rolled back alone and its caller receives the exception;
+# the others commit together and receive their own return values.
+#
+# A job is a callable taking a Session. Its return value is handed back to
+# the caller only after the commit succeeded.
+#
+#   UNIVERSITY_WRITE_WINDOW_MS   how long to gather a batch (default 2; 0 = commit every write inline)
+#   UNIVERSITY_WRITE_BATCH_SIZE  most jobs per transaction (default 64)
+#
+# Admission control keeps overload from turning into an ever-growing queue:
+# at most `max_in_flight` jobs are queued or running. A submit that finds
+# no free slot within `admission_timeout` is refused with WriteRejected
+# (HTTP 503 + Retry-After). So is a job the writer only reaches after its
+# queue deadline, since its caller has most likely given up on it. When a
+# transaction fails with SQLITE_BUSY (another process holds the lock), the
+# whole transaction is retried up to `busy_retries` times with jittered
+# exponential backoff. Only then are the jobs refused. Each attempt waits
+# for the lock at most deadline / (busy_retries + 1) via its own
+# busy_timeout, not the engine's (5s): the writer thread must not stall
+# past every deadline on one BEGIN IMMEDIATE and leave nothing to retry.
+#
+#   UNIVERSITY_WRITE_MAX_IN_FLIGHT        queued + running jobs (default 256)
+#   UNIVERSITY_WRITE_ADMISSION_TIMEOUT_MS wait for a free slot (default 50)
+#   UNIVERSITY_WRITE_DEADLINE_MS          longest a job may wait in the queue (default 2000)
+#   UNIVERSITY_WRITE_BUSY_RETRIES         retries of a busy transaction (default 3)
+
+DEFAULT_WINDOW_MS = 2
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_IN_FLIGHT = 256
+DEFAULT_ADMISSION_TIMEOUT_MS = 50
+DEFAULT_DEADLINE_MS = 2000
+DEFAULT_BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.01  # seconds; doubled on every retry, then jittered
+RETRY_AFTER_SECONDS = 1
+
+
+class WriteRejected(RuntimeError):
+    """A write refused by admission control; `reason` is queue_full, deadline or busy"""
+
+    def __init__(self, message: str, reason: str, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_busy(error: Exception):
+    """True for SQLITE_BUSY and its extended codes ('database is locked')"""
+    orig = getattr(error, "orig", None)
+    code = getattr(orig, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF == sqlite3.SQLITE_BUSY
+    return isinstance(error, OperationalError) and "database is locked" in str(orig)
+
+def _env_ms(name: str, default: float):
+    return float(os.environ.get(name, default)) / 1000
+
+
+class WriteBatcher:
+    def __init__(self, engine, window: float = None, batch_size: int = None, max_in_flight: int = None,
+                 admission_timeout: float = None, deadline: float = None, busy_retries: int = None):
+        self.engine = engine
+        if window is None:
+            window = _env_ms("UNIVERSITY_WRITE_WINDOW_MS", DEFAULT_WINDOW_MS)
+        self.window = window
+        self.batch_size = batch_size or int(os.environ.get("UNIVERSITY_WRITE_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        self.max_in_flight = max_in_flight or int(os.environ.get("UNIVERSITY_WRITE_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+        self.admission_timeout = (
+            _env_ms("UNIVERSITY_WRITE_ADMISSION_TIMEOUT_MS", DEFAULT_ADMISSION_TIMEOUT_MS) if admission_timeout is None else admission_timeout
+        )
+        self.deadline = _env_ms("UNIVERSITY_WRITE_DEADLINE_MS", DEFAULT_DEADLINE_MS) if deadline is None else deadline
+        self.busy_retries = int(os.environ.get("UNIVERSITY_WRITE_BUSY_RETRIES", DEFAULT_BUSY_RETRIES)) if busy_retries is None else busy_retries
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+        self.in_flight = 0
+        self.rejected = {"queue_full": 0, "deadline": 0, "busy": 0}
+        self.busy_retried = 0
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def submit(self, job) -> Future:
+        """Queue `job` for the writer thread and return a Future for its result; raises WriteRejected when full"""
+        if not self._slots.acquire(timeout=self.admission_timeout):
+            self._reject("queue_full")
+            raise WriteRejected("Too many writes in flight; retry later", "queue_full")
+        with self._lock:
+            self.in_flight += 1
+        future = Future()
+        future.add_done_callback(self._release)
+        # The job runs in the caller's context, so per-request instrumentation
+        # still sees its statements
+        item = (contextvars.copy_context(), job, future, time.monotonic() + self.deadline)
+        if not self.enabled:
+            self._apply([item])
+            return future
+        self._start()
+        self._queue.put(item)
+        return future
+
+    def run(self, job, timeout: float = None):
+        """Submit `job` and wait for its result; its exception is re-raised here"""
+        return self.submit(job).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "largest_batch": self.largest_batch,
+                "queued": self._queue.qsize(),
+                "in_flight": self.in_flight,
+                "rejected": dict(self.rejected),
+                "busy_retries": self.busy_retried,
+            }
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _reject(self, reason: str, count: int = 1):
+        with self._lock:
+            self.rejected[reason] += count
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="write-batcher", daemon=True)
+                    self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._apply(self._collect())
+
+    def _collect(self):
+        """Block for the first job, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _run_job(session: Session, job):
+        with session.begin_nested():
+            return job(session)
+
+    def _apply(self, batch):
+        """Run every job in one transaction and resolve each job's future"""
+        now = time.monotonic()
+        live = []
+        for context, job, future, deadline in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if deadline < now:
+                self._reject("deadline")
+                future.set_exception(WriteRejected("Write waited too long in the queue; retry later", "deadline"))
+                continue
+            live.append((context, job, future, deadline))
+        if not live:
+            return
+
+        for attempt in range(self.busy_retries + 1):
+            try:
+                outcomes = self._transaction(live, self.deadline / (self.busy_retries + 1))
+                break
+            except Exception as e:
+                retry = is_busy(e) and attempt < self.busy_retries and any(item[3] > time.monotonic() for item in live)
+                if not retry:
+                    # The transaction failed as a whole: every job gets the error
+                    if is_busy(e):
+                        self._reject("busy", len(live))
+                        e = WriteRejected("Database is busy; retry later", "busy")
+                    for _, _, future, _ in live:
+                        future.set_exception(e)
+                    return
+                with self._lock:
+                    self.busy_retried += 1
+                time.sleep(random.uniform(0, BUSY_BACKOFF * 2 ** attempt))
+
+        for future, error, result in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        with self._lock:
+            self.batches += 1
+            self.writes += len(live)
+            self.largest_batch = max(self.largest_batch, len(live))
+
+    def _transaction(self, batch, lock_timeout: float):
+        """Run the jobs in one committed transaction; returns (future, error, result) per job"""
+        outcomes = []
+        with self.engine.connect() as conn:
+            # Wait at most `lock_timeout` for the write lock (never longer
+            # than the connection's own busy_timeout), then put it back
+            busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {min(busy_timeout, max(int(lock_timeout * 1000), 1))}")
+            conn.commit()  # end the autobegun transaction, so the session below begins (and commits) its own
+            try:
+                with Session(bind=conn) as session:
+                    # Take the write lock up front; pysqlite would otherwise let the
+                    # first SAVEPOINT open (and its RELEASE commit) the transaction
+                    session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                    for context, job, future, _ in batch:
+                        try:
+                            outcomes.append((future, None, context.run(self._run_job, session, job)))
+                        except Exception as e:
+                            outcomes.append((future, e, None))
+                    session.commit()
+            finally:
+                conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+        # Futures are resolved only after the commit, so a retried
+        # transaction can run every job again
+        return outcomes